@@ -0,0 +1,124 @@
+"""
+Helpers shared by the daily scripts.
+
+Kept free of required dependencies so every script can import it from scripts/.
+"""
+
+import functools
+import http.client
+import json
+import os
+import re
+import sys
+import time
+from datetime import date
+
+try:
+    import orjson  # optional: faster JSON encode/decode
+except ImportError:
+    orjson = None
+
+OPENAI_HOST = "api.openai.com"
+OPENAI_CHAT_PATH = "/v1/chat/completions"
+OPENAI_MAX_ATTEMPTS = 3
+OPENAI_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Keep-alive connection reused by every OpenAI call in this process
+_openai_conn = None
+
+# ```json ... ``` wrapper around an LLM reply; the closing fence may be missing
+_FENCE_RE = re.compile(r"^```(?:json)?\s*(.*?)\s*(?:```|$)", re.DOTALL | re.IGNORECASE)
+_JSON_START_RE = re.compile(r"[\[{]")
+
+
+def json_loads(raw):
+    """Parse JSON bytes or text, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_dumps(obj, indent=False):
+    """Serialize to UTF-8 JSON bytes (compact, or 2-space indented), using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def save_today(path, data):
+    """Write today.json compact, via a temp file swapped in so readers never see a partial file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(json_dumps(data))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def openai_post(payload, timeout=30):
+    """
+    POST a chat-completions payload on the shared connection, retrying transient failures.
+
+    Dropped connections and 429/5xx responses are retried with backoff, up to
+    OPENAI_MAX_ATTEMPTS. Returns (status, body bytes) of the last response.
+    """
+    global _openai_conn
+    body = json_dumps(payload)
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {os.environ.get('OPENAI_API_KEY', '')}",
+    }
+    for attempt in range(OPENAI_MAX_ATTEMPTS):
+        last_attempt = attempt == OPENAI_MAX_ATTEMPTS - 1
+        try:
+            if _openai_conn is None:
+                _openai_conn = http.client.HTTPSConnection(OPENAI_HOST, timeout=timeout)
+            elif _openai_conn.sock is not None:
+                _openai_conn.sock.settimeout(timeout)
+            _openai_conn.timeout = timeout
+            _openai_conn.request("POST", OPENAI_CHAT_PATH, body=body, headers=headers)
+            resp = _openai_conn.getresponse()
+            data = resp.read()
+        except (http.client.HTTPException, OSError):
+            # Dropped keep-alive or network error: reconnect on the next attempt
+            if _openai_conn is not None:
+                _openai_conn.close()
+                _openai_conn = None
+            if last_attempt:
+                raise
+        else:
+            if resp.status not in OPENAI_RETRY_STATUSES or last_attempt:
+                return resp.status, data
+            print(f"[warn] OpenAI returned {resp.status}, retrying", file=sys.stderr)
+        time.sleep(0.5 * 2 ** attempt)
+
+
+def normalize_json_text(raw):
+    """Strip ```json fences and leading prose from an LLM reply, leaving the JSON text."""
+    if not isinstance(raw, str):
+        raise ValueError("LLM response is not text")
+    text = raw.strip()
+    fenced = _FENCE_RE.match(text)
+    if fenced:
+        return fenced.group(1)
+    if text and text[0] not in "[{":
+        start = _JSON_START_RE.search(text)
+        if start:
+            return text[start.start():].strip()
+    return text
+
+
+@functools.lru_cache(maxsize=64)
+def _timestamp_filename_base(timestamp):
+    # 2025-11-22T08:00:00Z -> 2025-11-22-0800
+    return timestamp.replace(':', '').replace('T', '-').replace('Z', '')[:15]
+
+
+def filename_base_for(data):
+    """Image filename (without .png) for an edition: timestamp-based, else its date."""
+    timestamp = data.get('timestamp', '')
+    if timestamp:
+        return _timestamp_filename_base(timestamp)
+    return data.get('date', date.today().isoformat())
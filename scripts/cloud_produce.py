@@ -13,20 +13,34 @@ Usage:
 
 import os
 import sys
-import json
 import argparse
+import hashlib
+import shutil
 import subprocess
-from datetime import date
+import traceback
+from datetime import date, datetime, timezone
 from pathlib import Path
 
-# Import existing scripts
+# Existing scripts are imported lazily by the step that needs them, so
+# --help, bad arguments and essence runs skip their import cost
 sys.path.insert(0, str(Path(__file__).parent))
-import update_emojis_ai
-import prepare_daily_post
-import generate_emoji_image
 
-INPUT_FILE = "public/data/today.json"
-CLOUD_PRODUCER_SCRIPT = "src/cloud/cli/produce.ts"
+from _common import filename_base_for, json_dumps, json_loads
+
+INPUT_FILE = Path("public/data/today.json")
+DAILY_IMAGE_DIR = Path("public/images/daily")
+CLOUD_PRODUCER_SCRIPT = Path("src/cloud/cli/produce.ts")
+
+# Call the globally installed tsx binary directly (see Dockerfile); npx adds
+# package resolution on every run and is only used as a fallback
+TSX_COMMAND = ["tsx"] if shutil.which("tsx") else ["npx", "tsx"]
+
+# Environment variables the cloud producer needs outside dry-run mode
+REQUIRED_ENV = frozenset({
+    "GOOGLE_CLOUD_PROJECT",
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    "CLOUD_STORAGE_BUCKET",
+})
 
 RSS_SOURCES = [
     "https://feeds.bbci.co.uk/news/world/rss.xml",
@@ -39,6 +53,7 @@ RSS_SOURCES = [
 def run_emoji_selection():
     """Run AI emoji selection"""
     print("[info] Running AI emoji selection...")
+    import update_emojis_ai
     result = update_emojis_ai.main()
     if result != 0:
         raise RuntimeError("AI emoji selection failed")
@@ -47,6 +62,7 @@ def run_emoji_selection():
 def run_prepare_post():
     """Run prepare daily post (determines type and adds essence if needed)"""
     print("[info] Preparing daily post...")
+    import prepare_daily_post
     result = prepare_daily_post.main()
     if result != 0:
         raise RuntimeError("Prepare daily post failed")
@@ -54,115 +70,97 @@ def run_prepare_post():
 
 def load_today_data():
     """Load today.json"""
-    if not os.path.exists(INPUT_FILE):
-        raise FileNotFoundError(f"Input file not found: {INPUT_FILE}")
-
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    try:
+        with open(INPUT_FILE, "rb") as f:
+            return json_loads(f.read())
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Input file not found: {INPUT_FILE}") from None
 
 
 def generate_image(data):
     """Generate image and return path"""
     print("[info] Generating image...")
+    import generate_emoji_image
 
-    # Get the generated image path from generate_emoji_image
-    # We need to modify generate_emoji_image.py to return the path
-    # For now, we'll construct it manually
-    today = data.get("date", date.today().isoformat())
-    from datetime import datetime
-    now = datetime.utcnow()
-    timestamp = now.strftime("%H%M")
-    image_filename = f"{today}-{timestamp}.png"
-    image_path = f"public/images/daily/{image_filename}"
-
-    # Run the image generation (clear sys.argv to avoid argument conflicts)
-    saved_argv = sys.argv
-    try:
-        sys.argv = ['generate_emoji_image.py']
-        result = generate_emoji_image.main()
-        if result != 0:
-            raise RuntimeError("Image generation failed")
-    finally:
-        sys.argv = saved_argv
+    # Build the output path up front and have generate_emoji_image write to it.
+    # Date and time come from one aware UTC instant, named by the shared helper
+    # (YYYY-MM-DD-HHMM); the edition's own timestamp may be a previous run's on essence days
+    stamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    image_path = DAILY_IMAGE_DIR / f"{filename_base_for({'timestamp': stamp})}.png"
 
-    # Find the most recently generated image
-    import glob
-    images = sorted(glob.glob("public/images/daily/*.png"), key=os.path.getmtime, reverse=True)
-    if not images:
-        raise FileNotFoundError("No generated image found")
+    # Run the image generation with explicit arguments (ignores our own sys.argv)
+    result = generate_emoji_image.main(["--output", str(image_path)])
+    if result != 0:
+        raise RuntimeError("Image generation failed")
 
-    return images[0]
+    return image_path
 
 
-def read_image_buffer(image_path):
-    """Read image file as buffer"""
+def image_sha256(image_path):
+    """Hash the image file in chunks (memory stays flat regardless of size)"""
     with open(image_path, "rb") as f:
-        return f.read()
+        return hashlib.file_digest(f, "sha256").hexdigest()
 
 
-def send_to_cloud(data, image_path, dry_run=False):
-    """Send edition data to cloud producer (TypeScript)"""
-    print("[info] Sending edition to cloud...")
+def start_cloud_producer(dry_run=False):
+    """Start the cloud producer (TypeScript) ahead of time.
+
+    The producer blocks on stdin until the edition is sent, so Node/tsx
+    start-up overlaps with emoji selection and image generation.
+    """
+    # Call TypeScript producer via Node.js (inherits our environment unless
+    # dry-run needs to be forced on)
+    env = {**os.environ, "CLOUD_DRY_RUN": "true"} if dry_run else None
+
+    # Ensure critical environment variables are set
+    missing_vars = sorted(var for var in REQUIRED_ENV if not os.environ.get(var))
+    if missing_vars and not dry_run:
+        print(f"[warn] Missing environment variables: {', '.join(missing_vars)}", file=sys.stderr)
+        print(f"[warn] Make sure to set them or source .env.local", file=sys.stderr)
+
+    # Use tsx to run TypeScript directly (requires: npm install -g tsx)
+    # The producer input is piped on stdin ("-"), so no temp file is needed.
+    # stdout/stderr are inherited so producer logs stream through as they happen.
+    return subprocess.Popen(
+        [*TSX_COMMAND, CLOUD_PRODUCER_SCRIPT, "-"],
+        env=env,
+        stdin=subprocess.PIPE,
+    )
 
-    # Read image as base64 for JSON transport
-    import base64
-    image_buffer = read_image_buffer(image_path)
-    image_base64 = base64.b64encode(image_buffer).decode('utf-8')
 
-    # Build producer input
+def stop_cloud_producer(producer):
+    """Terminate a producer that will not receive an edition"""
+    if producer is not None and producer.poll() is None:
+        producer.kill()
+        producer.wait()
+
+
+def send_to_cloud(producer, data, image_path):
+    """Send edition data to the running cloud producer (TypeScript)"""
+    print("[info] Sending edition to cloud...")
+
+    # Build producer input (the image is passed by path; TypeScript reads it directly)
     producer_input = {
         "date": data.get("date", date.today().isoformat()),
         "post_type": data.get("post_type", "normal"),
         "emojis": data.get("emojis"),
         "essence": data.get("essence"),
-        "image_buffer_base64": image_base64,
+        "image_path": str(image_path.resolve()),
+        "image_sha256": image_sha256(image_path),
         "rss_sources": RSS_SOURCES,
         "model": "gpt-4o-mini",
         "provider": "openai",
     }
 
-    # Write to temp file for TypeScript to read
-    temp_input = "/tmp/cloud_producer_input.json"
-    with open(temp_input, "w", encoding="utf-8") as f:
-        json.dump(producer_input, f)
+    # Flush our own buffered output so it stays ordered with the producer's logs
+    sys.stdout.flush()
+    sys.stderr.flush()
 
-    # Call TypeScript producer via Node.js
-    env = os.environ.copy()
-    if dry_run:
-        env["CLOUD_DRY_RUN"] = "true"
-
-    # Ensure critical environment variables are set
-    required_vars = [
-        "GOOGLE_CLOUD_PROJECT",
-        "GOOGLE_APPLICATION_CREDENTIALS",
-        "CLOUD_STORAGE_BUCKET",
-    ]
-    missing_vars = [var for var in required_vars if not env.get(var)]
-    if missing_vars and not dry_run:
-        print(f"[warn] Missing environment variables: {', '.join(missing_vars)}", file=sys.stderr)
-        print(f"[warn] Make sure to set them or source .env.local", file=sys.stderr)
-
-    try:
-        # Use tsx to run TypeScript directly (requires: npm install -g tsx)
-        result = subprocess.run(
-            ["npx", "tsx", CLOUD_PRODUCER_SCRIPT, temp_input],
-            env=env,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        print(result.stdout)
-        if result.stderr:
-            print(result.stderr, file=sys.stderr)
-    except subprocess.CalledProcessError as e:
-        print(f"[error] Cloud producer failed: {e}", file=sys.stderr)
-        print(e.stdout, file=sys.stdout)
-        print(e.stderr, file=sys.stderr)
-        raise
-    finally:
-        # Cleanup temp file
-        if os.path.exists(temp_input):
-            os.unlink(temp_input)
+    producer.communicate(json_dumps(producer_input))
+    if producer.returncode != 0:
+        error = subprocess.CalledProcessError(producer.returncode, producer.args)
+        print(f"[error] Cloud producer failed: {error}", file=sys.stderr)
+        raise error
 
 
 def main():
@@ -173,11 +171,15 @@ def main():
                       help="Dry-run mode (no cloud writes)")
     args = parser.parse_args()
 
+    producer = None
     try:
         # Set POST_TYPE environment variable for prepare_daily_post.py
         os.environ["POST_TYPE"] = args.type
         print(f"[info] POST_TYPE={args.type}")
 
+        # Start the cloud producer now; it waits for the edition on stdin
+        producer = start_cloud_producer(dry_run=args.dry_run)
+
         # Step 1: Run AI emoji selection (only for normal posts)
         if args.type == "normal":
             run_emoji_selection()
@@ -198,17 +200,21 @@ def main():
         print(f"[info] Image generated: {image_path}")
 
         # Step 5: Send to cloud
-        send_to_cloud(data, image_path, dry_run=args.dry_run)
+        send_to_cloud(producer, data, image_path)
 
         print("[info] ✓ Cloud production complete!")
         return 0
 
     except Exception as e:
         print(f"[error] Cloud production failed: {e}", file=sys.stderr)
-        import traceback
         traceback.print_exc()
         return 1
 
+    finally:
+        # Also covers SystemExit from a step and Ctrl-C; no-op once send_to_cloud
+        # has run the producer to completion
+        stop_cloud_producer(producer)
+
 
 if __name__ == "__main__":
     sys.exit(main())
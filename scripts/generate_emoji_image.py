@@ -13,25 +13,53 @@ Design:
 Usage:
   python scripts/generate_emoji_image.py           # Use today.json
   python scripts/generate_emoji_image.py --test    # Generate test image
+  python scripts/generate_emoji_image.py --serve   # Render JSON-lines jobs from stdin
 
 Output: public/images/daily/YYYY-MM-DD-HHMM.png
 """
 
 import os
 import sys
-import json
+import shutil
 import subprocess
-import tempfile
 import argparse
+import importlib.util
 import urllib.request
 import base64
-from datetime import date, datetime
+import html
+import string
+import tempfile
+import contextlib
+import functools
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+
+from _common import filename_base_for, json_dumps, json_loads
+
+
+def _png_compress_level(default=1):
+    """PNG_COMPRESS_LEVEL from the environment, clamped to zlib's 0-9; never fails at import."""
+    raw = os.getenv('PNG_COMPRESS_LEVEL')
+    if raw is None:
+        return default
+    try:
+        level = int(raw)
+    except ValueError:
+        print(f"[warn] PNG_COMPRESS_LEVEL={raw!r} is not an integer, using {default}", file=sys.stderr)
+        return default
+    if not 0 <= level <= 9:
+        level = min(max(level, 0), 9)
+        print(f"[warn] PNG_COMPRESS_LEVEL={raw!r} is outside 0-9, using {level}", file=sys.stderr)
+    return level
+
 
 # Configuration
 INPUT_FILE = "public/data/today.json"
 OUTPUT_DIR = "public/images/daily"
 SIZE = 1080
-RENDER_SIZE = 2160  # Render at 2x for better quality, then scale down
+PNG_COMPRESS_LEVEL = _png_compress_level()  # Fast zlib level by default; ~20% larger files, much faster encode
 
 # Design constants - Enhanced for better visual quality
 BG_COLOR = (245, 243, 238)      # Outer background (#F5F3EE)
@@ -57,6 +85,62 @@ ESSENCE_EMOJI_FONT_SIZE = 420  # Increased from 320 to 420
 ESSENCE_DATE_FONT_SIZE = 36
 ESSENCE_DATE_TOP_PADDING = 70
 
+# Derived color forms, computed once: 0-1 floats for AppKit/cairo, hex for ImageMagick/CSS
+_BG_NORM = tuple(c / 255 for c in BG_COLOR)
+_CARD_NORM = tuple(c / 255 for c in CARD_COLOR)
+_BORDER_NORM = tuple(c / 255 for c in BORDER_COLOR)
+_TEXT_NORM = tuple(c / 255 for c in TEXT_COLOR)
+_ESSENCE_BG_NORM = tuple(c / 255 for c in ESSENCE_BG_COLOR)
+_ESSENCE_TEXT_NORM = tuple(c / 255 for c in ESSENCE_TEXT_COLOR)
+
+_BG_HEX = '#{:02x}{:02x}{:02x}'.format(*BG_COLOR)
+_CARD_HEX = '#{:02x}{:02x}{:02x}'.format(*CARD_COLOR)
+_BORDER_HEX = '#{:02x}{:02x}{:02x}'.format(*BORDER_COLOR)
+_TEXT_HEX = '#{:02x}{:02x}{:02x}'.format(*TEXT_COLOR)
+_ESSENCE_BG_HEX = '#{:02x}{:02x}{:02x}'.format(*ESSENCE_BG_COLOR)
+_ESSENCE_TEXT_HEX = '#{:02x}{:02x}{:02x}'.format(*ESSENCE_TEXT_COLOR)
+
+# Card geometry: a square inset PADDING_OUTER from every canvas edge
+CARD_X = CARD_Y = PADDING_OUTER
+CARD_W = CARD_H = SIZE - 2 * PADDING_OUTER
+CARD_RECT = (CARD_X, CARD_Y, CARD_X + CARD_W, CARD_Y + CARD_H)
+
+# Bundled Inter fonts (assets/fonts, one level up from scripts/)
+FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'fonts')
+
+# Codepoint list for --prewarm-twemoji
+PREWARM_LIST_FILE = os.path.join(os.path.dirname(FONTS_DIR), 'emoji_codepoints.txt')
+
+# Pillow fallback fonts
+TEXT_FONT_PATHS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+)
+# First installed candidate, resolved once at import (None: use Pillow's default font)
+TEXT_FONT_PATH = next((p for p in TEXT_FONT_PATHS if os.path.isfile(p)), None)
+EMOJI_FONT_PATH = "/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf"
+
+# Renderer availability, probed once per process without spawning anything
+HAS_SWIFT = sys.platform == 'darwin' and shutil.which('swift') is not None
+HAS_RESVG = importlib.util.find_spec('resvg_py') is not None
+HAS_PLAYWRIGHT = importlib.util.find_spec('playwright') is not None
+_CONVERT = shutil.which('convert')
+HAS_PANGO_CAIRO = _CONVERT is not None or (
+    importlib.util.find_spec('cairo') is not None and importlib.util.find_spec('gi') is not None
+)
+
+# Minimal headless Chromium profile for one-page screenshots
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-gpu',
+    '--disable-dev-shm-usage',
+    '--disable-background-networking',
+    '--disable-extensions',
+    '--disable-default-apps',
+    '--no-first-run',
+    '--font-render-hinting=none',
+]
+
 # Twemoji configuration (env vars)
 TWEMOJI_BASE_URL = os.getenv(
     'TWEMOJI_BASE_URL',
@@ -65,7 +149,11 @@ TWEMOJI_BASE_URL = os.getenv(
 TWEMOJI_CACHE_DIR = os.getenv('TWEMOJI_CACHE_DIR', '/tmp/twemoji-cache')
 TWEMOJI_OFFLINE = os.getenv('TWEMOJI_OFFLINE', '0') == '1'
 
+# SVGs already loaded by this process, keyed by emoji (failures are not remembered)
+_SVG_MEM = {}
 
+
+@functools.lru_cache(maxsize=2048)
 def emoji_to_twemoji_codepoints(emoji_char):
     """
     Convert an emoji character to Twemoji filename format.
@@ -93,6 +181,63 @@ def emoji_to_twemoji_codepoints(emoji_char):
     return '-'.join(codepoints)
 
 
+@functools.lru_cache(maxsize=1)
+def _twemoji_pool():
+    """Shared keep-alive pool for Twemoji CDN downloads, or None without urllib3."""
+    try:
+        import urllib3
+    except ImportError:
+        return None
+    return urllib3.PoolManager(
+        num_pools=2,
+        maxsize=8,
+        retries=urllib3.Retry(total=2, backoff_factor=0.2),
+    )
+
+
+@contextlib.contextmanager
+def _atomic_file(path):
+    """
+    Open a uniquely named temp file next to path and move it into place on success.
+
+    One temp file per call, so concurrent writers of the same path never share it, and
+    os.replace means a failed or interrupted write never leaves a truncated file at path.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        # mkstemp creates 0600; cache entries must stay readable by other users (e.g. a
+        # root-built image prewarm read by a non-root runtime)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _atomic_write(path, data):
+    with _atomic_file(path) as f:
+        f.write(data)
+
+
+def fetch_twemoji(url, dest_path):
+    """Stream a Twemoji asset into dest_path, reusing one TLS connection across emojis when possible."""
+    pool = _twemoji_pool()
+    with _atomic_file(dest_path) as f:
+        if pool is None:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                shutil.copyfileobj(response, f)
+        else:
+            response = pool.request('GET', url, timeout=5.0, preload_content=False)
+            try:
+                if response.status != 200:
+                    raise OSError(f"HTTP {response.status}")
+                shutil.copyfileobj(response, f)
+            finally:
+                response.release_conn()
+
+
 def get_twemoji_svg(emoji_char):
     """
     Get Twemoji SVG content for an emoji, using cache or downloading.
@@ -103,6 +248,10 @@ def get_twemoji_svg(emoji_char):
     Returns:
         SVG content as string, or None if failed
     """
+    # Already loaded by this process
+    if emoji_char in _SVG_MEM:
+        return _SVG_MEM[emoji_char]
+
     # Get codepoint filename
     codepoints = emoji_to_twemoji_codepoints(emoji_char)
     cache_path = os.path.join(TWEMOJI_CACHE_DIR, f'{codepoints}.svg')
@@ -111,7 +260,9 @@ def get_twemoji_svg(emoji_char):
     if os.path.exists(cache_path):
         try:
             with open(cache_path, 'r', encoding='utf-8') as f:
-                return f.read()
+                svg_content = f.read()
+            _SVG_MEM[emoji_char] = svg_content
+            return svg_content
         except Exception as e:
             print(f"[warn] Failed to read cached Twemoji SVG: {e}", file=sys.stderr)
 
@@ -124,14 +275,12 @@ def get_twemoji_svg(emoji_char):
     url = f'{TWEMOJI_BASE_URL}/{codepoints}.svg'
     try:
         print(f"[info] Downloading Twemoji: {url}", file=sys.stderr)
-        with urllib.request.urlopen(url, timeout=5) as response:
-            svg_content = response.read().decode('utf-8')
-
-        # Cache it
         os.makedirs(TWEMOJI_CACHE_DIR, exist_ok=True)
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            f.write(svg_content)
+        fetch_twemoji(url, cache_path)
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            svg_content = f.read()
 
+        _SVG_MEM[emoji_char] = svg_content
         return svg_content
 
     except Exception as e:
@@ -139,33 +288,103 @@ def get_twemoji_svg(emoji_char):
         return None
 
 
+def get_twemoji_png(emoji_char, size_px):
+    """
+    Get a Twemoji raster at size_px, rasterizing the SVG with resvg once and caching the PNG.
+
+    Args:
+        emoji_char: Single emoji character
+        size_px: Target width/height in pixels
+
+    Returns:
+        PNG bytes, or None if resvg or the SVG is unavailable
+    """
+    if not HAS_RESVG:
+        return None
+
+    codepoints = emoji_to_twemoji_codepoints(emoji_char)
+    cache_path = os.path.join(TWEMOJI_CACHE_DIR, f'{codepoints}_{size_px}.png')
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                return f.read()
+        except Exception as e:
+            print(f"[warn] Failed to read cached Twemoji PNG: {e}", file=sys.stderr)
+
+    svg_content = get_twemoji_svg(emoji_char)
+    if not svg_content:
+        return None
+
+    try:
+        import resvg_py
+        png_bytes = bytes(resvg_py.svg_to_bytes(svg_string=svg_content, width=size_px, height=size_px))
+
+        os.makedirs(TWEMOJI_CACHE_DIR, exist_ok=True)
+        _atomic_write(cache_path, png_bytes)
+
+        return png_bytes
+
+    except Exception as e:
+        print(f"[warn] Failed to rasterize Twemoji for {emoji_char} ({codepoints}): {e}", file=sys.stderr)
+        return None
+
+
+def prefetch_twemoji(emoji_chars):
+    """Fetch the SVGs for several emojis concurrently so a cold cache costs about one round-trip."""
+    # One char per codepoint file: ❤ and ❤️ both map to 2764.svg
+    by_file = {}
+    for c in emoji_chars:
+        by_file.setdefault(emoji_to_twemoji_codepoints(c), c)
+    unique_chars = list(by_file.values())
+    if len(unique_chars) < 2:
+        # Nothing to overlap; no pool for a single fetch
+        for c in unique_chars:
+            get_twemoji_svg(c)
+        return
+    with ThreadPoolExecutor(max_workers=min(8, len(unique_chars))) as pool:
+        list(pool.map(get_twemoji_svg, unique_chars))
+
+
+def _is_font_file(path):
+    """Check that path exists and starts with a TrueType/OpenType signature."""
+    try:
+        with open(path, 'rb') as f:
+            magic = f.read(4)
+    except OSError:
+        return False
+    return magic in (b'\x00\x01\x00\x00', b'true', b'OTTO')
+
+
+@functools.lru_cache(maxsize=1)
 def get_font_css():
     """
     Generate CSS for fonts, preferring local Inter fonts over Google Fonts.
 
+    Local fonts are inlined as base64 data URLs so Chromium has nothing to fetch.
+
     Returns:
         CSS string for @font-face or @import
     """
-    # Get script directory to find assets/fonts relative to script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    repo_root = os.path.dirname(script_dir)  # Go up one level from scripts/
-    fonts_dir = os.path.join(repo_root, 'assets', 'fonts')
-
-    inter_regular = os.path.join(fonts_dir, 'Inter-Regular.ttf')
-    inter_medium = os.path.join(fonts_dir, 'Inter-Medium.ttf')
+    inter_regular = os.path.join(FONTS_DIR, 'Inter-Regular.ttf')
+    inter_medium = os.path.join(FONTS_DIR, 'Inter-Medium.ttf')
 
-    if os.path.exists(inter_regular) and os.path.exists(inter_medium):
+    if _is_font_file(inter_regular) and _is_font_file(inter_medium):
         print("[info] Using local Inter fonts", file=sys.stderr)
+        with open(inter_regular, 'rb') as f:
+            regular_b64 = base64.b64encode(f.read()).decode('ascii')
+        with open(inter_medium, 'rb') as f:
+            medium_b64 = base64.b64encode(f.read()).decode('ascii')
         return f'''
         @font-face {{
             font-family: 'Inter';
-            src: url('file://{inter_regular}');
+            src: url('data:font/ttf;base64,{regular_b64}') format('truetype');
             font-weight: 400;
             font-style: normal;
         }}
         @font-face {{
             font-family: 'Inter';
-            src: url('file://{inter_medium}');
+            src: url('data:font/ttf;base64,{medium_b64}') format('truetype');
             font-weight: 500;
             font-style: normal;
         }}
@@ -175,9 +394,23 @@ def get_font_css():
         return "@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500&display=swap');"
 
 
+_SVG_OPEN_RE = re.compile(r'<svg\b([^>]*)>')
+_SVG_GEOMETRY_ATTR_RE = re.compile(r'\s(?:x|y|width|height)\s*=\s*(?:"[^"]*"|\'[^\']*\')')
+
+
+def resize_svg(svg_content, **attrs):
+    """Rewrite the root <svg> tag with the given geometry attributes, dropping any it already had."""
+    extra = ''.join(f' {name}="{value}"' for name, value in attrs.items())
+
+    def _rewrite(match):
+        return f'<svg{extra}{_SVG_GEOMETRY_ATTR_RE.sub("", match.group(1))}>'
+
+    return _SVG_OPEN_RE.sub(_rewrite, svg_content, count=1)
+
+
 def render_emoji_html(emoji_char, size_px, with_halo=False, scale=1):
     """
-    Render an emoji as HTML using Twemoji SVG or font fallback.
+    Render an emoji as HTML using a Twemoji PNG/SVG or font fallback.
 
     Args:
         emoji_char: Single emoji character
@@ -188,13 +421,19 @@ def render_emoji_html(emoji_char, size_px, with_halo=False, scale=1):
     Returns:
         HTML string for the emoji
     """
-    svg_content = get_twemoji_svg(emoji_char)
-
-    if svg_content:
-        # Use Twemoji SVG - inline for best quality
-        # Extract viewBox to maintain aspect ratio
-        svg_content = svg_content.replace('<svg ', f'<svg width="{size_px}px" height="{size_px}px" ')
+    png_bytes = get_twemoji_png(emoji_char, size_px)
+    if png_bytes:
+        # Pre-rasterized Twemoji - Chromium decodes one small PNG instead of laying out SVG paths
+        b64 = base64.b64encode(png_bytes).decode('ascii')
+        twemoji_html = f'<img src="data:image/png;base64,{b64}" width="{size_px}" height="{size_px}" alt="">'
+    else:
+        svg_content = get_twemoji_svg(emoji_char)
+        twemoji_html = None
+        if svg_content:
+            # Use Twemoji SVG - inline for best quality; its viewBox keeps the aspect ratio
+            twemoji_html = resize_svg(svg_content, width=f'{size_px}px', height=f'{size_px}px')
 
+    if twemoji_html:
         if with_halo:
             halo_padding = 15 * scale
             halo_bg = 'rgba(0, 0, 0, 0.02)'
@@ -207,9 +446,9 @@ def render_emoji_html(emoji_char, size_px, with_halo=False, scale=1):
                 display: inline-flex;
                 align-items: center;
                 justify-content: center;
-            ">{svg_content}</div>'''
+            ">{twemoji_html}</div>'''
         else:
-            return f'<div class="emoji-svg-wrapper">{svg_content}</div>'
+            return f'<div class="emoji-svg-wrapper">{twemoji_html}</div>'
     else:
         # Fallback to font emoji
         if with_halo:
@@ -229,15 +468,27 @@ def render_emoji_html(emoji_char, size_px, with_halo=False, scale=1):
             return f'<span class="emoji">{emoji_char}</span>'
 
 
+# Parsed input files, keyed by (path, mtime_ns) so an edited file is re-read
+_DATA_CACHE = {}
+
+
 def load_emoji_data(path=INPUT_FILE):
-    """Load today's emoji data from JSON file."""
-    if not os.path.exists(path):
+    """Load today's emoji data from JSON file (parsed once per file version)."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
         print(f"[error] Input file not found: {path}", file=sys.stderr)
         sys.exit(1)
 
-    with open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    key = (path, st.st_mtime_ns)
+    if key in _DATA_CACHE:
+        return _DATA_CACHE[key]
 
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    data = json_loads(raw)
+    _DATA_CACHE[key] = data
     return data
 
 
@@ -245,7 +496,7 @@ def get_test_data():
     """Generate test data for local testing."""
     return {
         "date": date.today().isoformat(),
-        "timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
         "emojis": [
             {"char": "🌍", "label": "world"},
             {"char": "💡", "label": "idea"},
@@ -257,75 +508,66 @@ def get_test_data():
     }
 
 
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+@functools.lru_cache(maxsize=1024)
 def format_date(date_str):
     """Format date as '22 Nov 2025'."""
     try:
-        d = datetime.strptime(date_str, "%Y-%m-%d")
-        return d.strftime("%-d %b %Y")
-    except:
+        d = date.fromisoformat(date_str)
+    except (TypeError, ValueError):
         return date_str
+    return f"{d.day} {MONTHS[d.month - 1]} {d.year}"
 
 
-def generate_with_swift(emoji_chars, date_str, output_path):
-    """Generate image using Swift/AppKit - native macOS rendering."""
-
-    emoji_text = " ".join(emoji_chars)
-    formatted_date = format_date(date_str)
-
-    # Card dimensions
-    card_x = PADDING_OUTER
-    card_y = PADDING_OUTER
-    card_w = SIZE - 2 * PADDING_OUTER
-    card_h = SIZE - 2 * PADDING_OUTER
-
-    # Convert RGB tuples to normalized values
-    bg_r, bg_g, bg_b = BG_COLOR[0]/255, BG_COLOR[1]/255, BG_COLOR[2]/255
-    border_r, border_g, border_b = BORDER_COLOR[0]/255, BORDER_COLOR[1]/255, BORDER_COLOR[2]/255
-    text_r, text_g, text_b = TEXT_COLOR[0]/255, TEXT_COLOR[1]/255, TEXT_COLOR[2]/255
-
-    swift_code = f'''
+# AppKit sources for the Swift renderers. Layout constants are folded in once at
+# import; only the per-image fields ($emoji_text/$emoji_char, $formatted_date,
+# $output_path) are left for substitute().
+_SWIFT_GRID_TMPL = string.Template(string.Template(r'''
 import Cocoa
 
-let size = NSSize(width: {SIZE}, height: {SIZE})
+let size = NSSize(width: $size, height: $size)
 let image = NSImage(size: size)
 
 image.lockFocus()
 
 // Background
-NSColor(calibratedRed: {bg_r}, green: {bg_g}, blue: {bg_b}, alpha: 1.0).setFill()
+NSColor(calibratedRed: $bg_r, green: $bg_g, blue: $bg_b, alpha: 1.0).setFill()
 NSRect(origin: .zero, size: size).fill()
 
 // Card with rounded corners
-let cardRect = NSRect(x: {card_x}, y: {card_y}, width: {card_w}, height: {card_h})
-let cardPath = NSBezierPath(roundedRect: cardRect, xRadius: {CARD_RADIUS}, yRadius: {CARD_RADIUS})
+let cardRect = NSRect(x: $card_x, y: $card_y, width: $card_w, height: $card_h)
+let cardPath = NSBezierPath(roundedRect: cardRect, xRadius: $card_radius, yRadius: $card_radius)
 
 // Card fill first (so border draws on top)
 NSColor.white.setFill()
 cardPath.fill()
 
 // Card border
-NSColor(calibratedRed: {border_r}, green: {border_g}, blue: {border_b}, alpha: 1.0).setStroke()
-cardPath.lineWidth = {CARD_BORDER_WIDTH}
+NSColor(calibratedRed: $border_r, green: $border_g, blue: $border_b, alpha: 1.0).setStroke()
+cardPath.lineWidth = $border_width
 cardPath.stroke()
 
 // Date text (top-left of card)
-let dateText = "{formatted_date}"
-let dateFont = NSFont.systemFont(ofSize: {DATE_FONT_SIZE}, weight: .regular)
-let emojiText = "{emoji_text}"
-let emojiFont = NSFont.systemFont(ofSize: {EMOJI_FONT_SIZE})
+let dateText = "$formatted_date"
+let dateFont = NSFont.systemFont(ofSize: $date_font_size, weight: .regular)
+let emojiText = "$emoji_text"
+let emojiFont = NSFont.systemFont(ofSize: $emoji_font_size)
 let emojiAttributes: [NSAttributedString.Key: Any] = [
     .font: emojiFont
 ]
 
 let emojiSize = emojiText.size(withAttributes: emojiAttributes)
-let emojiX = ({SIZE} - emojiSize.width) / 2
-let emojiY = ({SIZE} - emojiSize.height) / 2
+let emojiX = ($size - emojiSize.width) / 2
+let emojiY = ($size - emojiSize.height) / 2
 
 let dateAttributes: [NSAttributedString.Key: Any] = [
     .font: dateFont,
-    .foregroundColor: NSColor(calibratedRed: {text_r}, green: {text_g}, blue: {text_b}, alpha: 1.0)
+    .foregroundColor: NSColor(calibratedRed: $text_r, green: $text_g, blue: $text_b, alpha: 1.0)
 ]
-let datePoint = NSPoint(x: emojiX, y: {SIZE - card_y - 70})
+let datePoint = NSPoint(x: emojiX, y: $date_y)
 dateText.draw(at: datePoint, withAttributes: dateAttributes)
 
 // Emojis (centered on card)
@@ -337,99 +579,120 @@ image.unlockFocus()
 // Save as PNG
 if let tiffData = image.tiffRepresentation,
    let bitmapRep = NSBitmapImageRep(data: tiffData),
-   let pngData = bitmapRep.representation(using: .png, properties: [:]) {{
-    try? pngData.write(to: URL(fileURLWithPath: "{output_path}"))
+   let pngData = bitmapRep.representation(using: .png, properties: [:]) {
+    try? pngData.write(to: URL(fileURLWithPath: "$output_path"))
     print("Success")
-}}
-'''
-
-    try:
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.swift', delete=False) as f:
-            f.write(swift_code)
-            swift_path = f.name
-
-        result = subprocess.run(
-            ['swift', swift_path],
-            capture_output=True,
-            text=True
-        )
-
-        os.unlink(swift_path)
-
-        if result.returncode == 0 and os.path.exists(output_path):
-            return True
-        else:
-            if result.stderr:
-                print(f"[info] Swift error: {result.stderr}", file=sys.stderr)
-            return False
-
-    except Exception as e:
-        print(f"[info] Swift rendering failed: {e}", file=sys.stderr)
-        return False
-
-
-def generate_essence_with_swift(emoji_char, date_str, output_path):
-    """Generate essence image using Swift/AppKit - native macOS rendering."""
-
-    formatted_date = format_date(date_str)
-
-    bg_r, bg_g, bg_b = ESSENCE_BG_COLOR[0]/255, ESSENCE_BG_COLOR[1]/255, ESSENCE_BG_COLOR[2]/255
-    text_r, text_g, text_b = ESSENCE_TEXT_COLOR[0]/255, ESSENCE_TEXT_COLOR[1]/255, ESSENCE_TEXT_COLOR[2]/255
-
-    swift_code = f'''
+}
+''').safe_substitute(
+    size=SIZE,
+    bg_r=_BG_NORM[0], bg_g=_BG_NORM[1], bg_b=_BG_NORM[2],
+    card_x=CARD_X, card_y=CARD_Y, card_w=CARD_W, card_h=CARD_H,
+    card_radius=CARD_RADIUS,
+    border_r=_BORDER_NORM[0], border_g=_BORDER_NORM[1], border_b=_BORDER_NORM[2],
+    border_width=CARD_BORDER_WIDTH,
+    date_font_size=DATE_FONT_SIZE,
+    emoji_font_size=EMOJI_FONT_SIZE,
+    text_r=_TEXT_NORM[0], text_g=_TEXT_NORM[1], text_b=_TEXT_NORM[2],
+    date_y=SIZE - CARD_Y - 70,
+))
+
+_SWIFT_ESSENCE_TMPL = string.Template(string.Template(r'''
 import Cocoa
 
-let size = NSSize(width: {SIZE}, height: {SIZE})
+let size = NSSize(width: $size, height: $size)
 let image = NSImage(size: size)
 
 image.lockFocus()
 
-NSColor(calibratedRed: {bg_r}, green: {bg_g}, blue: {bg_b}, alpha: 1.0).setFill()
+NSColor(calibratedRed: $bg_r, green: $bg_g, blue: $bg_b, alpha: 1.0).setFill()
 NSRect(origin: .zero, size: size).fill()
 
-let emojiText = "{emoji_char}"
-let emojiFont = NSFont.systemFont(ofSize: {ESSENCE_EMOJI_FONT_SIZE})
+let emojiText = "$emoji_char"
+let emojiFont = NSFont.systemFont(ofSize: $emoji_font_size)
 let emojiAttributes: [NSAttributedString.Key: Any] = [
     .font: emojiFont
 ]
 let emojiSize = emojiText.size(withAttributes: emojiAttributes)
-let emojiX = ({SIZE} - emojiSize.width) / 2
-let emojiY = ({SIZE} - emojiSize.height) / 2
+let emojiX = ($size - emojiSize.width) / 2
+let emojiY = ($size - emojiSize.height) / 2
 emojiText.draw(at: NSPoint(x: emojiX, y: emojiY), withAttributes: emojiAttributes)
 
-let dateText = "{formatted_date}"
-let dateFont = NSFont.systemFont(ofSize: {ESSENCE_DATE_FONT_SIZE}, weight: .regular)
+let dateText = "$formatted_date"
+let dateFont = NSFont.systemFont(ofSize: $date_font_size, weight: .regular)
 let dateAttributes: [NSAttributedString.Key: Any] = [
     .font: dateFont,
-    .foregroundColor: NSColor(calibratedRed: {text_r}, green: {text_g}, blue: {text_b}, alpha: 1.0)
+    .foregroundColor: NSColor(calibratedRed: $text_r, green: $text_g, blue: $text_b, alpha: 1.0)
 ]
 let dateSize = dateText.size(withAttributes: dateAttributes)
-let dateX = ({SIZE} - dateSize.width) / 2
-let dateY = {SIZE} - CGFloat({ESSENCE_DATE_TOP_PADDING}) - dateSize.height
+let dateX = ($size - dateSize.width) / 2
+let dateY = $size - CGFloat($date_top_padding) - dateSize.height
 dateText.draw(at: NSPoint(x: dateX, y: dateY), withAttributes: dateAttributes)
 
 image.unlockFocus()
 
 if let tiffData = image.tiffRepresentation,
    let bitmapRep = NSBitmapImageRep(data: tiffData),
-   let pngData = bitmapRep.representation(using: .png, properties: [:]) {{
-    try? pngData.write(to: URL(fileURLWithPath: "{output_path}"))
+   let pngData = bitmapRep.representation(using: .png, properties: [:]) {
+    try? pngData.write(to: URL(fileURLWithPath: "$output_path"))
     print("Success")
-}}
-'''
+}
+''').safe_substitute(
+    size=SIZE,
+    bg_r=_ESSENCE_BG_NORM[0], bg_g=_ESSENCE_BG_NORM[1], bg_b=_ESSENCE_BG_NORM[2],
+    emoji_font_size=ESSENCE_EMOJI_FONT_SIZE,
+    date_font_size=ESSENCE_DATE_FONT_SIZE,
+    text_r=_ESSENCE_TEXT_NORM[0], text_g=_ESSENCE_TEXT_NORM[1], text_b=_ESSENCE_TEXT_NORM[2],
+    date_top_padding=ESSENCE_DATE_TOP_PADDING,
+))
 
-    try:
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.swift', delete=False) as f:
-            f.write(swift_code)
-            swift_path = f.name
 
+def generate_with_swift(emoji_chars, date_str, output_path):
+    """Generate image using Swift/AppKit - native macOS rendering."""
+
+    swift_code = _SWIFT_GRID_TMPL.substitute(
+        emoji_text=" ".join(emoji_chars),
+        formatted_date=format_date(date_str),
+        output_path=output_path,
+    )
+
+    try:
+        # swift reads the script from stdin with "-", so no temp file is needed
         result = subprocess.run(
-            ['swift', swift_path],
+            ['swift', '-'],
+            input=swift_code,
             capture_output=True,
             text=True
         )
 
-        os.unlink(swift_path)
+        if result.returncode == 0 and os.path.exists(output_path):
+            return True
+        else:
+            if result.stderr:
+                print(f"[info] Swift error: {result.stderr}", file=sys.stderr)
+            return False
+
+    except Exception as e:
+        print(f"[info] Swift rendering failed: {e}", file=sys.stderr)
+        return False
+
+
+def generate_essence_with_swift(emoji_char, date_str, output_path):
+    """Generate essence image using Swift/AppKit - native macOS rendering."""
+
+    swift_code = _SWIFT_ESSENCE_TMPL.substitute(
+        emoji_char=emoji_char,
+        formatted_date=format_date(date_str),
+        output_path=output_path,
+    )
+
+    try:
+        # swift reads the script from stdin with "-", so no temp file is needed
+        result = subprocess.run(
+            ['swift', '-'],
+            input=swift_code,
+            capture_output=True,
+            text=True
+        )
 
         if result.returncode == 0 and os.path.exists(output_path):
             return True
@@ -443,52 +706,141 @@ if let tiffData = image.tiffRepresentation,
         return False
 
 
+@functools.lru_cache(maxsize=None)
+def load_pango_cairo():
+    """Import the pycairo + PangoCairo bindings, or return None if they are missing."""
+    try:
+        import cairo
+        import gi
+        gi.require_version('Pango', '1.0')
+        gi.require_version('PangoCairo', '1.0')
+        from gi.repository import Pango, PangoCairo
+    except (ImportError, ValueError):
+        return None
+    return cairo, Pango, PangoCairo
+
+
+def pango_layout(ctx, text, family, size_px):
+    """Create a PangoCairo layout for text in the given font family at an absolute pixel size."""
+    _, Pango, PangoCairo = load_pango_cairo()
+    layout = PangoCairo.create_layout(ctx)
+    font = Pango.FontDescription.from_string(family)
+    font.set_absolute_size(size_px * Pango.SCALE)
+    layout.set_font_description(font)
+    layout.set_text(text, -1)
+    return layout
+
+
+def draw_with_pango_bindings(emoji_chars, formatted_date, output_path):
+    """Draw the normal card in-process with pycairo + PangoCairo."""
+    cairo, Pango, PangoCairo = load_pango_cairo()
+
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, SIZE, SIZE)
+    ctx = cairo.Context(surface)
+
+    ctx.set_source_rgb(*_BG_NORM)
+    ctx.paint()
+
+    # Rounded card, built from four quarter arcs
+    x0, y0, x1, y1 = CARD_RECT
+    r = CARD_RADIUS
+    ctx.new_sub_path()
+    ctx.arc(x1 - r, y0 + r, r, -math.pi / 2, 0)
+    ctx.arc(x1 - r, y1 - r, r, 0, math.pi / 2)
+    ctx.arc(x0 + r, y1 - r, r, math.pi / 2, math.pi)
+    ctx.arc(x0 + r, y0 + r, r, math.pi, 3 * math.pi / 2)
+    ctx.close_path()
+    ctx.set_source_rgb(*_CARD_NORM)
+    ctx.fill_preserve()
+    ctx.set_source_rgb(*_BORDER_NORM)
+    ctx.set_line_width(CARD_BORDER_WIDTH)
+    ctx.stroke()
+
+    # Date baseline sits 50px below the card top, aligned with the first emoji column
+    layout = pango_layout(ctx, formatted_date, 'DejaVu Sans', DATE_FONT_SIZE)
+    ctx.set_source_rgb(*_TEXT_NORM)
+    ctx.move_to(compute_date_left(len(emoji_chars)), y0 + 50 - layout.get_baseline() / Pango.SCALE)
+    PangoCairo.show_layout(ctx, layout)
+
+    layout = pango_layout(ctx, " ".join(emoji_chars), 'Noto Color Emoji', EMOJI_FONT_SIZE)
+    width, height = layout.get_pixel_size()
+    ctx.move_to((SIZE - width) / 2, (SIZE - height) / 2)
+    PangoCairo.show_layout(ctx, layout)
+
+    surface.write_to_png(output_path)
+
+
+def draw_essence_with_pango_bindings(emoji_char, formatted_date, output_path):
+    """Draw the essence card in-process with pycairo + PangoCairo."""
+    cairo, Pango, PangoCairo = load_pango_cairo()
+
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, SIZE, SIZE)
+    ctx = cairo.Context(surface)
+
+    ctx.set_source_rgb(*_ESSENCE_BG_NORM)
+    ctx.paint()
+
+    layout = pango_layout(ctx, emoji_char, 'Noto Color Emoji', ESSENCE_EMOJI_FONT_SIZE)
+    width, height = layout.get_pixel_size()
+    ctx.move_to((SIZE - width) / 2, (SIZE - height) / 2)
+    PangoCairo.show_layout(ctx, layout)
+
+    layout = pango_layout(ctx, formatted_date, 'DejaVu Sans', ESSENCE_DATE_FONT_SIZE)
+    width, _ = layout.get_pixel_size()
+    ctx.set_source_rgb(*_ESSENCE_TEXT_NORM)
+    ctx.move_to((SIZE - width) / 2, ESSENCE_DATE_TOP_PADDING)
+    PangoCairo.show_layout(ctx, layout)
+
+    surface.write_to_png(output_path)
+
+
 def generate_with_pango_cairo(emoji_chars, date_str, output_path):
     """Generate image using Pango/Cairo for proper emoji support on Linux."""
 
     emoji_text = " ".join(emoji_chars)
     formatted_date = format_date(date_str)
 
-    # Card dimensions
-    card_x = PADDING_OUTER
-    card_y = PADDING_OUTER
-    card_w = SIZE - 2 * PADDING_OUTER
-    card_h = SIZE - 2 * PADDING_OUTER
-    date_left = compute_date_left(len(emoji_chars))
+    # Prefer the in-process bindings; ImageMagick is only needed without them
+    if load_pango_cairo():
+        try:
+            draw_with_pango_bindings(emoji_chars, formatted_date, output_path)
+            return True
+        except Exception as e:
+            print(f"[info] PangoCairo bindings failed, trying ImageMagick: {e}", file=sys.stderr)
 
-    # Convert colors to hex
-    bg_hex = '#{:02x}{:02x}{:02x}'.format(*BG_COLOR)
-    card_hex = '#{:02x}{:02x}{:02x}'.format(*CARD_COLOR)
-    border_hex = '#{:02x}{:02x}{:02x}'.format(*BORDER_COLOR)
-    text_hex = '#{:02x}{:02x}{:02x}'.format(*TEXT_COLOR)
+    date_left = compute_date_left(len(emoji_chars))
 
     try:
         # Check if convert (ImageMagick) is available
-        result = subprocess.run(['which', 'convert'], capture_output=True, text=True)
-        if result.returncode != 0:
+        if _CONVERT is None:
             print("[info] ImageMagick not available", file=sys.stderr)
             return False
 
         # Build ImageMagick command with Pango
         cmd = [
-            'convert',
+            _CONVERT,
             '-size', f'{SIZE}x{SIZE}',
-            f'xc:{bg_hex}',
+            f'xc:{_BG_HEX}',
             # Draw rounded rectangle for card
-            '-fill', card_hex,
-            '-stroke', border_hex,
+            '-fill', _CARD_HEX,
+            '-stroke', _BORDER_HEX,
             '-strokewidth', str(CARD_BORDER_WIDTH),
-            '-draw', f'roundrectangle {card_x},{card_y} {card_x+card_w},{card_y+card_h} {CARD_RADIUS},{CARD_RADIUS}',
-            # Draw date text
+            '-draw', f'roundrectangle {CARD_X},{CARD_Y} {CARD_X+CARD_W},{CARD_Y+CARD_H} {CARD_RADIUS},{CARD_RADIUS}',
+            # Draw date text (unstroked; -stroke is still set from the card)
+            '-stroke', 'none',
             '-font', 'DejaVu-Sans',
             '-pointsize', str(DATE_FONT_SIZE),
-            '-fill', text_hex,
-            '-annotate', f'+{date_left}+{card_y+50}', formatted_date,
-            # Draw emojis using pango for color emoji support
+            '-fill', _TEXT_HEX,
+            '-annotate', f'+{date_left}+{CARD_Y+50}', formatted_date,
+            # Draw emojis using pango for color emoji support, on a transparent
+            # layer composited onto the card so the output is a single image
+            '-background', 'none',
             '-gravity', 'center',
             '-font', 'Noto-Color-Emoji',
             '-pointsize', str(EMOJI_FONT_SIZE),
             f'pango:<span font="{EMOJI_FONT_SIZE}">{emoji_text}</span>',
+            '-composite',
+            '-strip',
             output_path
         ]
 
@@ -511,28 +863,34 @@ def generate_essence_with_pango_cairo(emoji_char, date_str, output_path):
 
     formatted_date = format_date(date_str)
 
-    bg_hex = '#{:02x}{:02x}{:02x}'.format(*ESSENCE_BG_COLOR)
-    text_hex = '#{:02x}{:02x}{:02x}'.format(*ESSENCE_TEXT_COLOR)
+    if load_pango_cairo():
+        try:
+            draw_essence_with_pango_bindings(emoji_char, formatted_date, output_path)
+            return True
+        except Exception as e:
+            print(f"[info] PangoCairo bindings failed, trying ImageMagick: {e}", file=sys.stderr)
 
     try:
-        result = subprocess.run(['which', 'convert'], capture_output=True, text=True)
-        if result.returncode != 0:
+        if _CONVERT is None:
             print("[info] ImageMagick not available", file=sys.stderr)
             return False
 
         cmd = [
-            'convert',
+            _CONVERT,
             '-size', f'{SIZE}x{SIZE}',
-            f'xc:{bg_hex}',
+            f'xc:{_ESSENCE_BG_HEX}',
+            '-background', 'none',
             '-gravity', 'center',
             '-font', 'Noto-Color-Emoji',
             '-pointsize', str(ESSENCE_EMOJI_FONT_SIZE),
             f'pango:<span font="{ESSENCE_EMOJI_FONT_SIZE}">{emoji_char}</span>',
+            '-composite',
             '-font', 'DejaVu-Sans',
             '-pointsize', str(ESSENCE_DATE_FONT_SIZE),
-            '-fill', text_hex,
+            '-fill', _ESSENCE_TEXT_HEX,
             '-gravity', 'north',
             '-annotate', f'+0+{ESSENCE_DATE_TOP_PADDING}', formatted_date,
+            '-strip',
             output_path
         ]
 
@@ -548,6 +906,19 @@ def generate_essence_with_pango_cairo(emoji_char, date_str, output_path):
         return False
 
 
+def save_png(img, output_path):
+    """Write a PIL image as PNG, using imagecodecs' faster encoder when it is installed."""
+    try:
+        import imagecodecs
+        import numpy as np
+    except ImportError:
+        img.save(output_path, 'PNG', compress_level=PNG_COMPRESS_LEVEL, optimize=False)
+        return
+
+    with open(output_path, 'wb') as f:
+        f.write(imagecodecs.png_encode(np.asarray(img), level=PNG_COMPRESS_LEVEL))
+
+
 def compute_date_left(num_emojis):
     """Estimate the left edge of the emoji row so the date aligns with column one."""
     if num_emojis <= 0:
@@ -558,36 +929,19 @@ def compute_date_left(num_emojis):
     return max(PADDING_OUTER, estimated_left)
 
 
-def generate_with_playwright(emoji_chars, date_str, output_path, debug_html=False):
-    """Generate image using Playwright for reliable headless browser rendering with enhanced quality."""
-
-    emoji_text = " ".join(emoji_chars)
-    formatted_date = format_date(date_str)
-
-    # Scale everything by 2 for high-DPI rendering
-    scale = RENDER_SIZE / SIZE
-
-    # Text color
-    text_hex = '#{:02x}{:02x}{:02x}'.format(*TEXT_COLOR)
-
-    # Render each emoji with Twemoji and circular halo
-    emoji_htmls = [render_emoji_html(e, EMOJI_FONT_SIZE * scale, with_halo=True, scale=scale) for e in emoji_chars]
-    emoji_spans = ''.join(emoji_htmls)
-
-    # Get font CSS (local or Google Fonts)
-    font_css = get_font_css()
-
-    html_content = f'''<!DOCTYPE html>
+# Playwright page templates. Layout constants are baked in at import time;
+# only the per-render $placeholders are substituted.
+GRID_HTML_TEMPLATE = string.Template(f'''<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <style>
-        {font_css}
+        $font_css
 
         * {{ margin: 0; padding: 0; box-sizing: border-box; }}
         html, body {{
-            width: {RENDER_SIZE}px;
-            height: {RENDER_SIZE}px;
+            width: {SIZE}px;
+            height: {SIZE}px;
             overflow: hidden;
         }}
         body {{
@@ -599,14 +953,14 @@ def generate_with_playwright(emoji_chars, date_str, output_path, debug_html=Fals
             font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
             -webkit-font-smoothing: antialiased;
             -moz-osx-font-smoothing: grayscale;
-            box-shadow: inset 0 0 {40*scale}px rgba(0, 0, 0, 0.03);
+            box-shadow: inset 0 0 40px rgba(0, 0, 0, 0.03);
             position: relative;
         }}
         .date {{
             position: absolute;
-            top: {80*scale}px;
-            font-size: {DATE_FONT_SIZE*scale}px;
-            color: {text_hex};
+            top: 80px;
+            font-size: {DATE_FONT_SIZE}px;
+            color: {_TEXT_HEX};
             font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
             font-weight: 500;
             letter-spacing: 0.5px;
@@ -617,106 +971,43 @@ def generate_with_playwright(emoji_chars, date_str, output_path, debug_html=Fals
             flex-wrap: nowrap;
             align-items: center;
             justify-content: center;
-            gap: {EMOJI_GAP*scale}px;
+            gap: {EMOJI_GAP}px;
         }}
         .emoji {{
-            font-size: {EMOJI_FONT_SIZE*scale}px;
+            font-size: {EMOJI_FONT_SIZE}px;
             line-height: 1;
             display: inline-block;
             vertical-align: middle;
             font-family: 'Noto Color Emoji', 'Apple Color Emoji', 'Segoe UI Emoji', 'Twemoji Mozilla', sans-serif;
-            filter: drop-shadow(0 {2*scale}px {8*scale}px rgba(0, 0, 0, 0.1));
+            filter: drop-shadow(0 2px 8px rgba(0, 0, 0, 0.1));
         }}
         .emoji-container svg,
-        .emoji-svg-wrapper svg {{
+        .emoji-container img,
+        .emoji-svg-wrapper svg,
+        .emoji-svg-wrapper img {{
             display: block;
             image-rendering: auto;
-            filter: drop-shadow(0 {2*scale}px {8*scale}px rgba(0, 0, 0, 0.1));
+            filter: drop-shadow(0 2px 8px rgba(0, 0, 0, 0.1));
         }}
     </style>
 </head>
 <body>
-    <div class="date">{formatted_date}</div>
-    <div class="emojis">{emoji_spans}</div>
+    <div class="date">$formatted_date</div>
+    <div class="emojis">$emoji_spans</div>
 </body>
-</html>'''
-
-    # Debug HTML output if requested
-    if debug_html:
-        debug_path = output_path.replace('.png', '.debug.html') if output_path.endswith('.png') else f'{output_path}.debug.html'
-        try:
-            with open(debug_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            print(f"[info] Debug HTML written to: {debug_path}", file=sys.stderr)
-        except Exception as e:
-            print(f"[warn] Failed to write debug HTML: {e}", file=sys.stderr)
-
-    try:
-        from playwright.sync_api import sync_playwright
-
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page(
-                viewport={'width': RENDER_SIZE, 'height': RENDER_SIZE},
-                device_scale_factor=1
-            )
-            page.set_content(html_content)
-
-            # Wait for fonts to load with robust check
-            try:
-                page.wait_for_function("document.fonts.status === 'loaded'", timeout=2000)
-            except:
-                # Fallback to timeout if fonts API not available
-                page.wait_for_timeout(500)
-
-            page.screenshot(path=output_path, full_page=False)
-            browser.close()
-
-        # Scale down from 2160 to 1080 for final output with high quality
-        from PIL import Image
-        img = Image.open(output_path)
-        img_resized = img.resize((SIZE, SIZE), Image.Resampling.LANCZOS)
-        img_resized.save(output_path, 'PNG', optimize=True, quality=95)
-
-        if os.path.exists(output_path) and os.path.getsize(output_path) > 1000:
-            return True
-        return False
-
-    except ImportError:
-        print("[info] Playwright not installed", file=sys.stderr)
-        return False
-    except Exception as e:
-        print(f"[info] Playwright rendering failed: {e}", file=sys.stderr)
-        return False
-
-
-def generate_essence_with_playwright(emoji_char, date_str, output_path, debug_html=False):
-    """Generate essence image using Playwright for reliable headless browser rendering with enhanced quality."""
+</html>''')
 
-    formatted_date = format_date(date_str)
-
-    # Scale everything by 2 for high-DPI rendering
-    scale = RENDER_SIZE / SIZE
-
-    text_hex = '#{:02x}{:02x}{:02x}'.format(*ESSENCE_TEXT_COLOR)
-
-    # Render emoji with Twemoji (no halo for essence mode)
-    emoji_html = render_emoji_html(emoji_char, ESSENCE_EMOJI_FONT_SIZE * scale, with_halo=False, scale=scale)
-
-    # Get font CSS (local or Google Fonts)
-    font_css = get_font_css()
-
-    html_content = f'''<!DOCTYPE html>
+ESSENCE_HTML_TEMPLATE = string.Template(f'''<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <style>
-        {font_css}
+        $font_css
 
         * {{ margin: 0; padding: 0; box-sizing: border-box; }}
         html, body {{
-            width: {RENDER_SIZE}px;
-            height: {RENDER_SIZE}px;
+            width: {SIZE}px;
+            height: {SIZE}px;
             overflow: hidden;
         }}
         body {{
@@ -728,36 +1019,95 @@ def generate_essence_with_playwright(emoji_char, date_str, output_path, debug_ht
             position: relative;
             -webkit-font-smoothing: antialiased;
             -moz-osx-font-smoothing: grayscale;
-            box-shadow: inset 0 0 {40*scale}px rgba(0, 0, 0, 0.03);
+            box-shadow: inset 0 0 40px rgba(0, 0, 0, 0.03);
         }}
         .emoji {{
-            font-size: {ESSENCE_EMOJI_FONT_SIZE * scale}px;
+            font-size: {ESSENCE_EMOJI_FONT_SIZE}px;
             line-height: 1;
             font-family: 'Noto Color Emoji', 'Apple Color Emoji', 'Segoe UI Emoji', sans-serif;
-            filter: drop-shadow(0 {4*scale}px {20*scale}px rgba(0, 0, 0, 0.12));
+            filter: drop-shadow(0 4px 20px rgba(0, 0, 0, 0.12));
         }}
-        .emoji-svg-wrapper svg {{
+        .emoji-svg-wrapper svg,
+        .emoji-svg-wrapper img {{
             display: block;
             image-rendering: auto;
-            filter: drop-shadow(0 {4*scale}px {20*scale}px rgba(0, 0, 0, 0.12));
+            filter: drop-shadow(0 4px 20px rgba(0, 0, 0, 0.12));
         }}
         .date {{
             position: absolute;
-            top: {ESSENCE_DATE_TOP_PADDING * scale}px;
+            top: {ESSENCE_DATE_TOP_PADDING}px;
             left: 50%;
             transform: translateX(-50%);
-            font-size: {ESSENCE_DATE_FONT_SIZE * scale}px;
+            font-size: {ESSENCE_DATE_FONT_SIZE}px;
             font-weight: 500;
-            color: {text_hex};
+            color: {_ESSENCE_TEXT_HEX};
             letter-spacing: 0.02em;
         }}
     </style>
 </head>
 <body>
-    {emoji_html}
-    <div class="date">{formatted_date}</div>
+    $emoji_html
+    <div class="date">$formatted_date</div>
 </body>
-</html>'''
+</html>''')
+
+
+@contextlib.contextmanager
+def playwright_page():
+    """Launch Chromium once and yield a page with a SIZE x SIZE viewport."""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(args=CHROMIUM_ARGS, chromium_sandbox=False)
+        try:
+            context = browser.new_context(
+                viewport={'width': SIZE, 'height': SIZE},
+                device_scale_factor=1
+            )
+            yield context.new_page()
+        finally:
+            browser.close()
+
+
+def screenshot_html(page, html_content, output_path):
+    """Render html_content on an open Playwright page and screenshot it to output_path."""
+    page.set_content(html_content, wait_until='load')
+
+    # document.fonts.ready is a Promise; evaluate() awaits it without polling
+    page.evaluate("document.fonts.ready")
+
+    # Chromium's PNG is the final output; write it without a decode/re-encode pass
+    png_bytes = page.screenshot(type='png', full_page=False)
+    if len(png_bytes) <= 1000:
+        return False
+
+    with open(output_path, 'wb') as f:
+        f.write(png_bytes)
+    return True
+
+
+def generate_with_playwright(emoji_chars, date_str, output_path, debug_html=False, page=None):
+    """Generate image using Playwright for reliable headless browser rendering with enhanced quality.
+
+    Pass an open page (see playwright_page) to reuse one browser across several images.
+    """
+
+    emoji_text = " ".join(emoji_chars)
+    formatted_date = format_date(date_str)
+
+    # Render each emoji with Twemoji and circular halo
+    prefetch_twemoji(emoji_chars)
+    emoji_htmls = [render_emoji_html(e, EMOJI_FONT_SIZE, with_halo=True) for e in emoji_chars]
+    emoji_spans = ''.join(emoji_htmls)
+
+    # Get font CSS (local or Google Fonts)
+    font_css = get_font_css()
+
+    html_content = GRID_HTML_TEMPLATE.substitute(
+        font_css=font_css,
+        formatted_date=formatted_date,
+        emoji_spans=emoji_spans,
+    )
 
     # Debug HTML output if requested
     if debug_html:
@@ -770,35 +1120,51 @@ def generate_essence_with_playwright(emoji_char, date_str, output_path, debug_ht
             print(f"[warn] Failed to write debug HTML: {e}", file=sys.stderr)
 
     try:
-        from playwright.sync_api import sync_playwright
+        if page is not None:
+            return screenshot_html(page, html_content, output_path)
+        with playwright_page() as page:
+            return screenshot_html(page, html_content, output_path)
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page(
-                viewport={'width': RENDER_SIZE, 'height': RENDER_SIZE},
-                device_scale_factor=1
-            )
-            page.set_content(html_content)
+    except ImportError:
+        print("[info] Playwright not installed", file=sys.stderr)
+        return False
+    except Exception as e:
+        print(f"[info] Playwright rendering failed: {e}", file=sys.stderr)
+        return False
 
-            # Wait for fonts to load with robust check
-            try:
-                page.wait_for_function("document.fonts.status === 'loaded'", timeout=2000)
-            except:
-                # Fallback to timeout if fonts API not available
-                page.wait_for_timeout(500)
 
-            page.screenshot(path=output_path, full_page=False)
-            browser.close()
+def generate_essence_with_playwright(emoji_char, date_str, output_path, debug_html=False, page=None):
+    """Generate essence image using Playwright for reliable headless browser rendering with enhanced quality."""
 
-        # Scale down from 2160 to 1080 for final output with high quality
-        from PIL import Image
-        img = Image.open(output_path)
-        img_resized = img.resize((SIZE, SIZE), Image.Resampling.LANCZOS)
-        img_resized.save(output_path, 'PNG', optimize=True, quality=95)
+    formatted_date = format_date(date_str)
 
-        if os.path.exists(output_path) and os.path.getsize(output_path) > 1000:
-            return True
-        return False
+    # Render emoji with Twemoji (no halo for essence mode)
+    emoji_html = render_emoji_html(emoji_char, ESSENCE_EMOJI_FONT_SIZE, with_halo=False)
+
+    # Get font CSS (local or Google Fonts)
+    font_css = get_font_css()
+
+    html_content = ESSENCE_HTML_TEMPLATE.substitute(
+        font_css=font_css,
+        formatted_date=formatted_date,
+        emoji_html=emoji_html,
+    )
+
+    # Debug HTML output if requested
+    if debug_html:
+        debug_path = output_path.replace('.png', '.debug.html') if output_path.endswith('.png') else f'{output_path}.debug.html'
+        try:
+            with open(debug_path, 'w', encoding='utf-8') as f:
+                f.write(html_content)
+            print(f"[info] Debug HTML written to: {debug_path}", file=sys.stderr)
+        except Exception as e:
+            print(f"[warn] Failed to write debug HTML: {e}", file=sys.stderr)
+
+    try:
+        if page is not None:
+            return screenshot_html(page, html_content, output_path)
+        with playwright_page() as page:
+            return screenshot_html(page, html_content, output_path)
 
     except ImportError:
         print("[info] Playwright not installed", file=sys.stderr)
@@ -808,110 +1174,238 @@ def generate_essence_with_playwright(emoji_char, date_str, output_path, debug_ht
         return False
 
 
-def generate_with_pillow(emoji_chars, date_str, output_path):
-    """Generate image using Pillow - fallback with limited emoji support."""
-    from PIL import Image, ImageDraw, ImageFont
+def render_many(jobs):
+    """
+    Render several images with a single Chromium instance (backfills, regeneration).
+
+    Args:
+        jobs: Iterable of (post_type, emojis, date_str, output_path) tuples, where
+              emojis is the emoji list for normal posts or the single essence emoji
+
+    Returns:
+        List of per-job success flags, in job order
+    """
+    results = []
+    with playwright_page() as page:
+        for post_type, emojis, date_str, output_path in jobs:
+            if post_type == 'essence':
+                success = generate_essence_with_playwright(emojis, date_str, output_path, page=page)
+            else:
+                success = generate_with_playwright(emojis, date_str, output_path, page=page)
+            results.append(success)
+    return results
+
+
+# Essence card as a single SVG for resvg, laid out to match the Playwright page.
+# CSS top: 70px puts the date's baseline one Inter ascent (~0.97em) lower.
+ESSENCE_DATE_BASELINE = ESSENCE_DATE_TOP_PADDING + round(ESSENCE_DATE_FONT_SIZE * 0.97)
+ESSENCE_SVG_TEMPLATE = string.Template(f'''<svg xmlns="http://www.w3.org/2000/svg" width="{SIZE}" height="{SIZE}" viewBox="0 0 {SIZE} {SIZE}">
+    <defs>
+        <filter id="shadow" x="-20%" y="-20%" width="140%" height="140%">
+            <feDropShadow dx="0" dy="4" stdDeviation="10" flood-color="#000000" flood-opacity="0.12"/>
+        </filter>
+    </defs>
+    <rect width="{SIZE}" height="{SIZE}" fill="#ffffff"/>
+    <g filter="url(#shadow)">$emoji_svg</g>
+    <text x="{SIZE // 2}" y="{ESSENCE_DATE_BASELINE}" text-anchor="middle"
+          font-family="Inter, DejaVu Sans, sans-serif" font-weight="500" font-size="{ESSENCE_DATE_FONT_SIZE}"
+          letter-spacing="{ESSENCE_DATE_FONT_SIZE * 0.02}" fill="{_ESSENCE_TEXT_HEX}">$formatted_date</text>
+</svg>''')
+
+
+def generate_essence_with_resvg(emoji_char, date_str, output_path):
+    """Generate essence image by rasterizing one composed SVG with resvg - no browser needed."""
+    try:
+        import resvg_py
+    except ImportError:
+        print("[info] resvg not installed", file=sys.stderr)
+        return False
+
+    svg_content = get_twemoji_svg(emoji_char)
+    if not svg_content:
+        print("[info] No Twemoji SVG for essence emoji, skipping resvg", file=sys.stderr)
+        return False
+
+    # Nest the Twemoji <svg> at its centered position; its own viewBox does the scaling
+    offset = (SIZE - ESSENCE_EMOJI_FONT_SIZE) // 2
+    emoji_svg = resize_svg(
+        svg_content,
+        x=offset, y=offset,
+        width=ESSENCE_EMOJI_FONT_SIZE, height=ESSENCE_EMOJI_FONT_SIZE,
+    )
+    svg = ESSENCE_SVG_TEMPLATE.substitute(
+        emoji_svg=emoji_svg,
+        formatted_date=html.escape(format_date(date_str)),
+    )
+
+    try:
+        png_bytes = bytes(resvg_py.svg_to_bytes(
+            svg_string=svg,
+            width=SIZE,
+            height=SIZE,
+            font_dirs=[FONTS_DIR],
+        ))
+    except Exception as e:
+        print(f"[info] resvg rendering failed: {e}", file=sys.stderr)
+        return False
+
+    with open(output_path, 'wb') as f:
+        f.write(png_bytes)
+    return True
+
+
+@functools.lru_cache(maxsize=8)
+def _get_text_font(size):
+    """Load the DejaVu date font once per size, falling back to Pillow's default."""
+    from PIL import ImageFont
+
+    if TEXT_FONT_PATH is not None:
+        try:
+            return ImageFont.truetype(TEXT_FONT_PATH, size)
+        except Exception as e:
+            print(f"[warn] Could not load {TEXT_FONT_PATH}: {e}", file=sys.stderr)
+    return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=8)
+def _get_emoji_font(size):
+    """Load Noto Color Emoji once per size; raises if the font is unavailable."""
+    from PIL import ImageFont
+
+    return ImageFont.truetype(EMOJI_FONT_PATH, size)
+
+
+@functools.lru_cache(maxsize=4096)
+def _glyph_bbox(char, size):
+    """Measure one emoji glyph at the given size; shared by every image in the process."""
+    return _get_emoji_font(size).getbbox(char)
+
+
+@functools.lru_cache(maxsize=1)
+def _card_template():
+    """Draw the background and rounded card once; callers paint on a copy."""
+    from PIL import Image, ImageDraw
 
     img = Image.new('RGB', (SIZE, SIZE), color=BG_COLOR)
     draw = ImageDraw.Draw(img)
 
-    # Card dimensions
-    card_x = PADDING_OUTER
-    card_y = PADDING_OUTER
-    card_w = SIZE - 2 * PADDING_OUTER
-    card_h = SIZE - 2 * PADDING_OUTER
-
     # Draw card with rounded corners
-    card_rect = [card_x, card_y, card_x + card_w, card_y + card_h]
-
-    # Draw card
-    draw.rounded_rectangle(card_rect, radius=CARD_RADIUS,
+    draw.rounded_rectangle(CARD_RECT, radius=CARD_RADIUS,
                           fill=CARD_COLOR, outline=BORDER_COLOR,
                           width=CARD_BORDER_WIDTH)
+    return img
 
-    # Find text fonts
-    text_fonts = [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "/usr/share/fonts/TTF/DejaVuSans.ttf",
-    ]
 
-    text_font = None
-    for font_path in text_fonts:
-        if os.path.exists(font_path):
-            try:
-                text_font = ImageFont.truetype(font_path, DATE_FONT_SIZE)
-                break
-            except:
-                continue
+# Decoded Twemoji rasters keyed by (emoji, size); shared, so callers must not mutate them
+_TILE_MEM = {}
+
+
+def _twemoji_tile(emoji_char, size_px):
+    """Decoded RGBA Twemoji raster, or None if it is unavailable (failures are not remembered)."""
+    from io import BytesIO
+    from PIL import Image
+
+    key = (emoji_char, size_px)
+    if key not in _TILE_MEM:
+        png_bytes = get_twemoji_png(emoji_char, size_px)
+        if not png_bytes:
+            return None
+        _TILE_MEM[key] = Image.open(BytesIO(png_bytes)).convert('RGBA')
+    return _TILE_MEM[key]
+
+
+def _twemoji_tiles(emoji_chars, size_px):
+    """Decode the cached Twemoji PNG for every emoji, or return None if any is unavailable."""
+    tiles = [_twemoji_tile(char, size_px) for char in emoji_chars]
+    if not tiles or None in tiles:
+        return None
+    return tiles
+
+
+def generate_with_pillow(emoji_chars, date_str, output_path):
+    """Generate image using Pillow - fallback with limited emoji support."""
+    from PIL import ImageDraw
+
+    img = _card_template().copy()
+    draw = ImageDraw.Draw(img)
 
-    if not text_font:
-        text_font = ImageFont.load_default()
+    text_font = _get_text_font(DATE_FONT_SIZE)
 
     emoji_text = " ".join(emoji_chars)
     formatted_date = format_date(date_str)
     emoji_x = compute_date_left(len(emoji_chars))
 
-    try:
-        emoji_font = ImageFont.truetype("/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf", EMOJI_FONT_SIZE)
-        bbox = draw.textbbox((0, 0), emoji_text, font=emoji_font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        emoji_x = (SIZE - text_width) // 2
-        emoji_y = (SIZE - text_height) // 2
-        draw.text((emoji_x, emoji_y), emoji_text, font=emoji_font, embedded_color=True)
-    except Exception as e:
-        print(f"[warn] Emoji font failed: {e}", file=sys.stderr)
-        # Just draw text centered
-        emoji_y = SIZE // 2
-        draw.text((SIZE//2, SIZE//2), emoji_text, font=text_font,
-                 fill=TEXT_COLOR, anchor='mm')
+    prefetch_twemoji(emoji_chars)
+    tiles = _twemoji_tiles(emoji_chars, EMOJI_FONT_SIZE)
+
+    if tiles:
+        # Paste pre-rasterized Twemoji so the fallback matches the browser output
+        row_width = EMOJI_FONT_SIZE * len(tiles) + EMOJI_GAP * (len(tiles) - 1)
+        emoji_x = (SIZE - row_width) // 2
+        emoji_y = (SIZE - EMOJI_FONT_SIZE) // 2
+
+        x = emoji_x
+        for tile in tiles:
+            img.paste(tile, (x, emoji_y), tile)
+            x += EMOJI_FONT_SIZE + EMOJI_GAP
+    else:
+        try:
+            # Lay glyphs out one by one so the row uses EMOJI_GAP like the other renderers
+            emoji_font = _get_emoji_font(EMOJI_FONT_SIZE)
+            boxes = [_glyph_bbox(char, EMOJI_FONT_SIZE) for char in emoji_chars]
+            row_width = sum(b[2] - b[0] for b in boxes) + EMOJI_GAP * max(len(boxes) - 1, 0)
+            text_height = max((b[3] for b in boxes), default=0) - min((b[1] for b in boxes), default=0)
+            emoji_x = (SIZE - row_width) // 2
+            emoji_y = (SIZE - text_height) // 2
+
+            x = emoji_x
+            for char, box in zip(emoji_chars, boxes):
+                draw.text((x - box[0], emoji_y), char, font=emoji_font, embedded_color=True)
+                x += box[2] - box[0] + EMOJI_GAP
+        except Exception as e:
+            print(f"[warn] Emoji font failed: {e}", file=sys.stderr)
+            # Just draw text centered
+            emoji_y = SIZE // 2
+            draw.text((SIZE//2, SIZE//2), emoji_text, font=text_font,
+                     fill=TEXT_COLOR, anchor='mm')
 
     # Draw date after computing emoji start so it aligns to the first emoji column
-    draw.text((emoji_x, card_y + 30), formatted_date,
+    draw.text((emoji_x, CARD_Y + 30), formatted_date,
               font=text_font, fill=TEXT_COLOR)
 
-    img.save(output_path, 'PNG')
+    save_png(img, output_path)
     return True
 
 
 def generate_essence_with_pillow(emoji_char, date_str, output_path):
     """Generate essence image using Pillow - fallback with limited emoji support."""
-    from PIL import Image, ImageDraw, ImageFont
+    from PIL import Image, ImageDraw
 
     img = Image.new('RGB', (SIZE, SIZE), color=ESSENCE_BG_COLOR)
     draw = ImageDraw.Draw(img)
 
-    text_fonts = [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "/usr/share/fonts/TTF/DejaVuSans.ttf",
-    ]
-
-    text_font = None
-    for font_path in text_fonts:
-        if os.path.exists(font_path):
-            try:
-                text_font = ImageFont.truetype(font_path, ESSENCE_DATE_FONT_SIZE)
-                break
-            except:
-                continue
-
-    if not text_font:
-        text_font = ImageFont.load_default()
+    text_font = _get_text_font(ESSENCE_DATE_FONT_SIZE)
 
     formatted_date = format_date(date_str)
 
-    try:
-        emoji_font = ImageFont.truetype("/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf", ESSENCE_EMOJI_FONT_SIZE)
-        bbox = draw.textbbox((0, 0), emoji_char, font=emoji_font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        emoji_x = (SIZE - text_width) // 2
-        emoji_y = (SIZE - text_height) // 2
-        draw.text((emoji_x, emoji_y), emoji_char, font=emoji_font, embedded_color=True)
-    except Exception as e:
-        print(f"[warn] Emoji font failed: {e}", file=sys.stderr)
-        draw.text((SIZE//2, SIZE//2), emoji_char, font=text_font,
-                 fill=ESSENCE_TEXT_COLOR, anchor='mm')
+    tile = _twemoji_tile(emoji_char, ESSENCE_EMOJI_FONT_SIZE)
+    if tile is not None:
+        # Cached Twemoji raster: a paste instead of a colour-glyph rasterize
+        offset = (SIZE - ESSENCE_EMOJI_FONT_SIZE) // 2
+        img.paste(tile, (offset, offset), tile)
+    else:
+        try:
+            emoji_font = _get_emoji_font(ESSENCE_EMOJI_FONT_SIZE)
+            bbox = draw.textbbox((0, 0), emoji_char, font=emoji_font)
+            text_width = bbox[2] - bbox[0]
+            text_height = bbox[3] - bbox[1]
+            emoji_x = (SIZE - text_width) // 2
+            emoji_y = (SIZE - text_height) // 2
+            draw.text((emoji_x, emoji_y), emoji_char, font=emoji_font, embedded_color=True)
+        except Exception as e:
+            print(f"[warn] Emoji font failed: {e}", file=sys.stderr)
+            draw.text((SIZE//2, SIZE//2), emoji_char, font=text_font,
+                     fill=ESSENCE_TEXT_COLOR, anchor='mm')
 
     date_bbox = draw.textbbox((0, 0), formatted_date, font=text_font)
     date_w = date_bbox[2] - date_bbox[0]
@@ -919,11 +1413,175 @@ def generate_essence_with_pillow(emoji_char, date_str, output_path):
     date_y = ESSENCE_DATE_TOP_PADDING
     draw.text((date_x, date_y), formatted_date, font=text_font, fill=ESSENCE_TEXT_COLOR)
 
-    img.save(output_path, 'PNG')
+    save_png(img, output_path)
+    return True
+
+
+def recompress_for_archive(path):
+    """Losslessly shrink a PNG in place with zopflipng; skipped if it is not installed."""
+    zopflipng = shutil.which('zopflipng')
+    if zopflipng is None:
+        print("[warn] zopflipng not installed - archive copy left as is", file=sys.stderr)
+        return False
+
+    print("[info] Recompressing with zopflipng for archive...")
+    result = subprocess.run(
+        [zopflipng, '-y', '--filters=p', '--iterations=15', path, path],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        print(f"[warn] zopflipng failed: {result.stderr.strip()}", file=sys.stderr)
+        return False
     return True
 
 
-def main():
+def load_prewarm_emojis(path):
+    """Read emoji codepoint sequences (e.g. 1f1fa-1f1f8), one per line; '#' starts a comment."""
+    emojis = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = line.split('#', 1)[0].strip()
+            if entry:
+                emojis.append(''.join(chr(int(cp, 16)) for cp in entry.split('-')))
+    return emojis
+
+
+def prewarm_twemoji(path):
+    """Fill the Twemoji cache (SVGs, plus PNGs when resvg is available) so renders need no network."""
+    try:
+        emojis = load_prewarm_emojis(path)
+    except (OSError, ValueError) as e:
+        print(f"[error] Could not read prewarm list {path}: {e}", file=sys.stderr)
+        return 1
+
+    print(f"[info] Prewarming Twemoji cache with {len(emojis)} emojis...")
+    prefetch_twemoji(emojis)
+
+    # Variants sharing a codepoint file (❤ / ❤️) were fetched once; this re-check is a cache hit
+    cached = [e for e in emojis if get_twemoji_svg(e)]
+    if not cached:
+        print(f"[error] No Twemoji SVGs could be cached in {TWEMOJI_CACHE_DIR}", file=sys.stderr)
+        return 1
+    if HAS_RESVG:
+        for emoji_char in cached:
+            get_twemoji_png(emoji_char, EMOJI_FONT_SIZE)
+            get_twemoji_png(emoji_char, ESSENCE_EMOJI_FONT_SIZE)
+
+    print(f"[success] Twemoji cache warmed: {len(cached)}/{len(emojis)} in {TWEMOJI_CACHE_DIR}")
+    return 0
+
+
+def render_image(post_type, emoji_chars, essence_emoji, date_str, output_path, debug_html=False, page=None):
+    """
+    Render one image with the first renderer that succeeds.
+
+    Pass an open page (see playwright_page) to reuse one browser across several images.
+    """
+    success = False
+
+    # Method 1: Swift (macOS)
+    if HAS_SWIFT:
+        print("[info] Trying Swift/AppKit rendering...")
+        if post_type == 'essence':
+            success = generate_essence_with_swift(essence_emoji, date_str, output_path)
+        else:
+            success = generate_with_swift(emoji_chars, date_str, output_path)
+        if success:
+            print("[success] Generated with Swift/AppKit")
+
+    # Method 2: Playwright (Linux - best emoji support)
+    if not success and HAS_PLAYWRIGHT:
+        print("[info] Trying Playwright rendering...")
+        if post_type == 'essence':
+            success = generate_essence_with_playwright(essence_emoji, date_str, output_path, debug_html=debug_html, page=page)
+        else:
+            success = generate_with_playwright(emoji_chars, date_str, output_path, debug_html=debug_html, page=page)
+        if success:
+            print("[success] Generated with Playwright")
+
+    # Method 3: resvg (essence only, no browser; no Inter or vignette, so below Playwright)
+    if not success and post_type == 'essence' and HAS_RESVG:
+        print("[info] Trying resvg rendering...")
+        success = generate_essence_with_resvg(essence_emoji, date_str, output_path)
+        if success:
+            print("[success] Generated with resvg")
+
+    # Method 4: Pango/Cairo with ImageMagick (Linux)
+    if not success and HAS_PANGO_CAIRO:
+        print("[info] Trying Pango/Cairo rendering...")
+        if post_type == 'essence':
+            success = generate_essence_with_pango_cairo(essence_emoji, date_str, output_path)
+        else:
+            success = generate_with_pango_cairo(emoji_chars, date_str, output_path)
+        if success:
+            print("[success] Generated with Pango/Cairo")
+
+    # Method 5: Pillow (fallback - limited emoji support)
+    if not success:
+        print("[info] Trying Pillow rendering (fallback)...")
+        if post_type == 'essence':
+            success = generate_essence_with_pillow(essence_emoji, date_str, output_path)
+        else:
+            success = generate_with_pillow(emoji_chars, date_str, output_path)
+        if success:
+            print("[warn] Generated with Pillow - emojis may not render correctly")
+
+    return success
+
+
+def edition_fields(data):
+    """Pull (post_type, emoji_chars, essence_emoji, date_str) out of a today.json-shaped dict."""
+    emoji_chars = [e.get('char', '?') for e in data.get('emojis', [])]
+    date_str = data.get('date', date.today().isoformat())
+    post_type = data.get('post_type', 'normal')
+    essence = data.get('essence', {}) if isinstance(data.get('essence'), dict) else {}
+    essence_emoji = essence.get('emoji') or (emoji_chars[0] if emoji_chars else '?')
+    return post_type, emoji_chars, essence_emoji, date_str
+
+
+def serve_jobs(lines, out):
+    """
+    Render a stream of JSON-lines jobs with one long-lived Chromium (--serve).
+
+    Each job is a today.json-shaped object, optionally with an "output" path. One
+    {"output", "ok"} line is written to out per job; renderer logs go to stderr.
+    """
+    with contextlib.ExitStack() as stack:
+        page = None
+        if HAS_PLAYWRIGHT:
+            try:
+                page = stack.enter_context(playwright_page())
+            except Exception as e:
+                print(f"[warn] Could not start a shared Chromium: {e}", file=sys.stderr)
+
+        for line in lines:
+            if not line.strip():
+                continue
+            output_path = None
+            try:
+                job = json_loads(line)
+            except ValueError as e:
+                result = {'output': None, 'ok': False, 'error': f'invalid job: {e}'}
+            else:
+                # A bad job (wrong shape, unwritable path, renderer crash) must not stop the queue
+                try:
+                    post_type, emoji_chars, essence_emoji, date_str = edition_fields(job)
+                    output_path = job.get('output') or os.path.join(OUTPUT_DIR, f"{filename_base_for(job)}.png")
+                    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+                    with contextlib.redirect_stdout(sys.stderr):
+                        ok = render_image(post_type, emoji_chars, essence_emoji, date_str, output_path, page=page)
+                    result = {'output': output_path, 'ok': bool(ok and os.path.exists(output_path))}
+                except Exception as e:
+                    result = {'output': output_path, 'ok': False, 'error': str(e)}
+
+            out.write(json_dumps(result).decode('utf-8') + '\n')
+            out.flush()
+    return 0
+
+
+def main(argv=None):
+    """Generate the image; argv defaults to sys.argv[1:] when called as a script."""
     parser = argparse.ArgumentParser(description='Generate emoji image for Instagram')
     parser.add_argument('--test', action='store_true',
                        help='Generate test image with sample data')
@@ -933,7 +1591,19 @@ def main():
                        help='Custom output path')
     parser.add_argument('--debug-html', action='store_true',
                        help='Write debug HTML file alongside output')
-    args = parser.parse_args()
+    parser.add_argument('--archive', action='store_true',
+                       help='Recompress the output with zopflipng for long-term storage (slow)')
+    parser.add_argument('--prewarm-twemoji', nargs='?', const=PREWARM_LIST_FILE, metavar='FILE',
+                       help='Download the Twemoji assets listed in FILE into the cache and exit')
+    parser.add_argument('--serve', action='store_true',
+                       help='Read JSON-lines jobs from stdin and render them with one shared browser')
+    args = parser.parse_args(argv)
+
+    if args.prewarm_twemoji:
+        return prewarm_twemoji(args.prewarm_twemoji)
+
+    if args.serve:
+        return serve_jobs(sys.stdin, sys.stdout)
 
     # Load data
     if args.test:
@@ -943,12 +1613,8 @@ def main():
         print("[info] Loading emoji data...")
         data = load_emoji_data(args.input or INPUT_FILE)
 
-    emojis = data.get('emojis', [])
-    emoji_chars = [e.get('char', '?') for e in emojis]
-    date_str = data.get('date', date.today().isoformat())
-    post_type = data.get('post_type', 'normal')
+    post_type, emoji_chars, essence_emoji, date_str = edition_fields(data)
     essence = data.get('essence', {}) if isinstance(data.get('essence'), dict) else {}
-    essence_emoji = essence.get('emoji') or (emoji_chars[0] if emoji_chars else '?')
 
     print(f"[info] Date: {date_str}")
     print(f"[info] Platform: {sys.platform}")
@@ -970,12 +1636,7 @@ def main():
     elif args.test:
         output_path = os.path.join(OUTPUT_DIR, "test.png")
     else:
-        timestamp = data.get('timestamp', '')
-        if timestamp:
-            filename_base = timestamp.replace(':', '').replace('T', '-').replace('Z', '')[:15]
-        else:
-            filename_base = date_str
-        output_path = os.path.join(OUTPUT_DIR, f"{filename_base}.png")
+        output_path = os.path.join(OUTPUT_DIR, f"{filename_base_for(data)}.png")
 
     print(f"[info] Output path: {output_path}")
 
@@ -984,50 +1645,13 @@ def main():
     else:
         print("[info] Generating normal image (5 emojis grid)...")
 
-    # Try rendering methods
-    success = False
-
-    # Method 1: Swift (macOS)
-    if sys.platform == 'darwin':
-        print("[info] Trying Swift/AppKit rendering...")
-        if post_type == 'essence':
-            success = generate_essence_with_swift(essence_emoji, date_str, output_path)
-        else:
-            success = generate_with_swift(emoji_chars, date_str, output_path)
-        if success:
-            print("[success] Generated with Swift/AppKit")
-
-    # Method 2: Playwright (Linux - best emoji support)
-    if not success:
-        print("[info] Trying Playwright rendering...")
-        if post_type == 'essence':
-            success = generate_essence_with_playwright(essence_emoji, date_str, output_path, debug_html=args.debug_html)
-        else:
-            success = generate_with_playwright(emoji_chars, date_str, output_path, debug_html=args.debug_html)
-        if success:
-            print("[success] Generated with Playwright")
-
-    # Method 3: Pango/Cairo with ImageMagick (Linux)
-    if not success:
-        print("[info] Trying Pango/Cairo rendering...")
-        if post_type == 'essence':
-            success = generate_essence_with_pango_cairo(essence_emoji, date_str, output_path)
-        else:
-            success = generate_with_pango_cairo(emoji_chars, date_str, output_path)
-        if success:
-            print("[success] Generated with Pango/Cairo")
-
-    # Method 4: Pillow (fallback - limited emoji support)
-    if not success:
-        print("[info] Trying Pillow rendering (fallback)...")
-        if post_type == 'essence':
-            success = generate_essence_with_pillow(essence_emoji, date_str, output_path)
-        else:
-            success = generate_with_pillow(emoji_chars, date_str, output_path)
-        if success:
-            print("[warn] Generated with Pillow - emojis may not render correctly")
+    success = render_image(post_type, emoji_chars, essence_emoji, date_str, output_path,
+                           debug_html=args.debug_html)
 
     if success and os.path.exists(output_path):
+        if args.archive:
+            recompress_for_archive(output_path)
+
         file_size = os.path.getsize(output_path)
         print(f"[success] Image saved: {output_path} ({file_size} bytes)")
 
@@ -12,21 +12,45 @@ Environment variables:
 
 import os
 import sys
-import json
 import time
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import date
 
+from _common import filename_base_for, json_dumps, json_loads
+
 # Configuration
 INPUT_FILE = "public/data/today.json"
 IMAGE_DIR = "public/images/daily"
 POSTED_LOG = "data/instagram_posted.json"
+CONTAINER_CACHE = "data/ig_container_cache.json"
+CONTAINER_TTL = 55 * 60  # Graph API containers expire after an hour
 GRAPH_API_VERSION = "v18.0"
 GRAPH_API_BASE = f"https://graph.facebook.com/{GRAPH_API_VERSION}"
 
 # For GitHub Pages hosting
 GITHUB_PAGES_BASE = "https://todayinemojis.com"
 
+# Caption boilerplate
+CAPTION_HASHTAGS = "#TodayInEmojis #DailyVibes #NewsInEmojis #Minimalism #FiveEmojis #WorldNews #DailyMood"
+ESSENCE_CAPTION_HASHTAGS = "#TodayInEmojis #EssenceOfTheDay #DailyMood"
+CAPTION_FOOTER = "todayinemojis.com"
+
+# Seconds to wait between image checks (~95s total, like the old 10 x 10s loop)
+VERIFY_BACKOFF = (1, 2, 4, 8, 16, 32, 32)
+
+# Seconds to wait between publish retries while Instagram finalizes a FINISHED
+# container (~15s total, covering the fixed 10s wait this replaces)
+PUBLISH_BACKOFF = (1, 2, 4, 8)
+MEDIA_NOT_READY_SUBCODE = 2207027
+
+# One keep-alive session so the TLS handshakes to graph.facebook.com and the
+# image host are paid once per run
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=2))
+SESSION.headers['Connection'] = 'keep-alive'
+
 def get_env_vars():
     """Get required environment variables."""
     access_token = os.environ.get('INSTAGRAM_ACCESS_TOKEN')
@@ -48,8 +72,8 @@ def was_already_posted(timestamp):
         return False
 
     try:
-        with open(POSTED_LOG, 'r', encoding='utf-8') as f:
-            posted = json.load(f)
+        with open(POSTED_LOG, 'rb') as f:
+            posted = json_loads(f.read())
             return timestamp in posted.get('timestamps', [])
     except Exception as e:
         print(f"[warn] Could not read posted log: {e}", file=sys.stderr)
@@ -61,8 +85,8 @@ def mark_as_posted(timestamp, media_id):
 
     if os.path.exists(POSTED_LOG):
         try:
-            with open(POSTED_LOG, 'r', encoding='utf-8') as f:
-                posted = json.load(f)
+            with open(POSTED_LOG, 'rb') as f:
+                posted = json_loads(f.read())
         except Exception:
             pass
 
@@ -83,41 +107,75 @@ def mark_as_posted(timestamp, media_id):
     posted['posts'] = posted['posts'][-100:]
 
     os.makedirs(os.path.dirname(POSTED_LOG), exist_ok=True)
-    with open(POSTED_LOG, 'w', encoding='utf-8') as f:
-        json.dump(posted, f, indent=2)
+    with open(POSTED_LOG, 'wb') as f:
+        f.write(json_dumps(posted, indent=True))
 
     print(f"[info] Marked {timestamp} as posted")
 
+def container_cache_key(image_url, caption):
+    """Cache key for a media container built from this image and caption."""
+    return hashlib.blake2b(f"{image_url}\n{caption}".encode('utf-8'), digest_size=16).hexdigest()
+
+def load_container_cache():
+    """Read the container cache, dropping malformed entries and ones too old to publish."""
+    try:
+        with open(CONTAINER_CACHE, 'rb') as f:
+            cache = json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    now = time.time()
+    return {
+        k: v for k, v in cache.items()
+        if isinstance(v, dict)
+        and isinstance(v.get('container_id'), str)
+        and isinstance(v.get('created_at'), (int, float))
+        and now - v['created_at'] < CONTAINER_TTL
+    }
+
+def save_container_cache(cache):
+    """Persist the container cache."""
+    os.makedirs(os.path.dirname(CONTAINER_CACHE), exist_ok=True)
+    with open(CONTAINER_CACHE, 'wb') as f:
+        f.write(json_dumps(cache, indent=True))
+
 def load_emoji_data():
     """Load today's emoji data for caption generation."""
     if not os.path.exists(INPUT_FILE):
         print(f"[error] Input file not found: {INPUT_FILE}", file=sys.stderr)
         sys.exit(1)
 
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open(INPUT_FILE, 'rb') as f:
+        return json_loads(f.read())
 
 def get_image_url(data):
     """Get the public URL for today's image."""
-    timestamp = data.get('timestamp', '')
-
-    if timestamp:
-        # Convert timestamp to filename-safe format: 2025-11-22T08:00:00Z -> 2025-11-22-0800
-        filename_base = timestamp.replace(':', '').replace('T', '-').replace('Z', '')[:15]
-    else:
-        filename_base = data.get('date', date.today().isoformat())
+    filename_base = filename_base_for(data)
 
     # The image will be hosted on GitHub Pages after commit
     image_url = f"{GITHUB_PAGES_BASE}/images/daily/{filename_base}.png"
 
     return image_url
 
-def verify_image_accessible(image_url, max_attempts=10):
-    """Verify the image URL is publicly accessible."""
+def probe_image(image_url):
+    """HEAD the image; if the host refuses HEAD, confirm it with a 1-byte ranged GET instead."""
+    response = SESSION.head(image_url, timeout=5, allow_redirects=True)
+    if response.status_code in (403, 405) or (
+        response.status_code == 200 and 'image' not in response.headers.get('content-type', '')
+    ):
+        response = SESSION.get(image_url, headers={'Range': 'bytes=0-0'}, timeout=5,
+                               allow_redirects=True, stream=True)
+        response.close()
+    return response
+
+def verify_image_accessible(image_url, backoff=VERIFY_BACKOFF):
+    """Verify the image URL is publicly accessible, backing off between attempts."""
+    max_attempts = len(backoff) + 1
     for attempt in range(max_attempts):
         try:
-            response = requests.head(image_url, timeout=10)
-            if response.status_code == 200:
+            response = probe_image(image_url)
+            if response.status_code in (200, 206):
                 content_type = response.headers.get('content-type', '')
                 if 'image' in content_type:
                     print(f"[success] Image verified accessible: {response.status_code}")
@@ -129,7 +187,8 @@ def verify_image_accessible(image_url, max_attempts=10):
         except Exception as e:
             print(f"[warn] Image check failed: {e}, attempt {attempt + 1}/{max_attempts}")
 
-        time.sleep(10)
+        if attempt < len(backoff):
+            time.sleep(backoff[attempt])
 
     print(f"[error] Image not accessible after {max_attempts} attempts", file=sys.stderr)
     return False
@@ -141,17 +200,15 @@ def generate_essence_caption(data):
     emoji = (essence.get('emoji') or "🌍").strip()
     rationale = (essence.get('rationale') or "a mix of signals").strip()
 
-    caption_parts = [
+    return '\n'.join([
         f"Today I am {emotion_label} because {rationale}.",
         "",
-        f"{emoji}",
+        emoji,
         "",
-        "#TodayInEmojis #EssenceOfTheDay #DailyMood",
+        ESSENCE_CAPTION_HASHTAGS,
         "",
-        "todayinemojis.com",
-    ]
-
-    return '\n'.join(caption_parts)
+        CAPTION_FOOTER,
+    ])
 
 
 def generate_caption(data):
@@ -160,41 +217,34 @@ def generate_caption(data):
         return generate_essence_caption(data)
 
     emojis = data.get('emojis', [])
+    emoji_chars = [e.get('char', '') for e in emojis]
 
-    # Get emoji characters and labels
-    emoji_chars = ' '.join([e.get('char', '') for e in emojis])
-    labels = [e.get('label', '') for e in emojis]
+    # One line per labelled emoji, prefixed by the emoji
+    label_lines = []
+    for emoji, e in zip(emoji_chars, emojis):
+        label = e.get('label', '')
+        if label:
+            label_text = label.strip()
+            label_lines.append(f"{emoji or '•'} {label_text[:1].upper()}{label_text[1:]}")
 
-    # Build caption
-    caption_parts = [
-        f"Today's vibe {emoji_chars}",
+    return '\n'.join([
+        f"Today's vibe {' '.join(emoji_chars)}",
         "",
         "Feel the day. Don't read it.",
         "",
-    ]
-
-    # Add labels prefixed by emoji
-    for emoji, label in zip([e.get('char', '') for e in emojis], labels):
-        if label:
-            prefix = emoji if emoji else "•"
-            label_text = label.strip()
-            if label_text:
-                label_text = label_text[0].upper() + label_text[1:]
-            caption_parts.append(f"{prefix} {label_text}")
-
-    caption_parts.extend([
+        *label_lines,
         "",
-        "#TodayInEmojis #DailyVibes #NewsInEmojis #Minimalism #FiveEmojis #WorldNews #DailyMood",
+        CAPTION_HASHTAGS,
         "",
-        "todayinemojis.com"
+        CAPTION_FOOTER,
     ])
 
-    return '\n'.join(caption_parts)
-
 def create_media_container(account_id, access_token, image_url, caption):
     """Create a media container for the image."""
     url = f"{GRAPH_API_BASE}/{account_id}/media"
 
+    # Sent as a form body rather than a query string, so the caption is not
+    # length-limited by the URL and the token stays out of access logs
     params = {
         'image_url': image_url,
         'caption': caption,
@@ -204,7 +254,7 @@ def create_media_container(account_id, access_token, image_url, caption):
     print(f"[info] Creating media container...")
     print(f"[info] Image URL: {image_url}")
 
-    response = requests.post(url, params=params)
+    response = SESSION.post(url, data=params, timeout=15)
 
     if response.status_code != 200:
         print(f"[error] Failed to create media container: {response.status_code}", file=sys.stderr)
@@ -232,7 +282,7 @@ def check_container_status(account_id, access_token, container_id):
 
     max_attempts = 30  # Increase attempts
     for attempt in range(max_attempts):
-        response = requests.get(url, params=params)
+        response = SESSION.get(url, params=params)
 
         if response.status_code != 200:
             print(f"[warn] Status check failed: {response.status_code}", file=sys.stderr)
@@ -246,9 +296,7 @@ def check_container_status(account_id, access_token, container_id):
         print(f"[info] Container status: {status} {status_msg} (attempt {attempt + 1}/{max_attempts})")
 
         if status == 'FINISHED':
-            # Wait a bit more after FINISHED to ensure Instagram is truly ready
-            print(f"[info] Waiting 10 seconds for Instagram to finalize...")
-            time.sleep(10)
+            # publish_media retries if Instagram is still finalizing
             print(f"[success] Container ready for publishing")
             return True
         elif status == 'ERROR':
@@ -266,6 +314,14 @@ def check_container_status(account_id, access_token, container_id):
     print(f"[error] Container processing timed out", file=sys.stderr)
     return False
 
+def media_not_ready(response):
+    """True if a failed publish means the container is still being finalized."""
+    try:
+        error = response.json().get('error', {})
+    except ValueError:
+        return False
+    return error.get('error_subcode') == MEDIA_NOT_READY_SUBCODE or 'not ready' in error.get('message', '').lower()
+
 def publish_media(account_id, access_token, container_id):
     """Publish the media container to Instagram."""
     url = f"{GRAPH_API_BASE}/{account_id}/media_publish"
@@ -277,7 +333,13 @@ def publish_media(account_id, access_token, container_id):
 
     print(f"[info] Publishing to Instagram...")
 
-    response = requests.post(url, params=params)
+    for attempt in range(len(PUBLISH_BACKOFF) + 1):
+        response = SESSION.post(url, data=params, timeout=15)
+        if response.status_code == 200 or attempt == len(PUBLISH_BACKOFF) or not media_not_ready(response):
+            break
+        delay = PUBLISH_BACKOFF[attempt]
+        print(f"[info] Media not ready yet, retrying publish in {delay}s...")
+        time.sleep(delay)
 
     if response.status_code != 200:
         print(f"[error] Failed to publish: {response.status_code}", file=sys.stderr)
@@ -334,14 +396,26 @@ def main():
     print(f"[info] Caption generated ({len(caption)} chars)")
     print(f"[info] Caption preview: {caption[:100]}...")
 
-    # Create media container
-    container_id = create_media_container(account_id, access_token, image_url, caption)
-    if not container_id:
-        print("[error] Failed to create media container", file=sys.stderr)
-        sys.exit(1)
+    # Reuse a container from a recent run that failed to publish the same post
+    container_key = container_cache_key(image_url, caption)
+    container_cache = load_container_cache()
+    container_id = container_cache.get(container_key, {}).get('container_id')
+    if container_id:
+        print(f"[info] Reusing media container from a previous attempt: {container_id}")
+    else:
+        # Create media container
+        container_id = create_media_container(account_id, access_token, image_url, caption)
+        if not container_id:
+            print("[error] Failed to create media container", file=sys.stderr)
+            sys.exit(1)
+        container_cache[container_key] = {'container_id': container_id, 'created_at': time.time()}
+        save_container_cache(container_cache)
 
     # Wait for container to be ready
     if not check_container_status(account_id, access_token, container_id):
+        # Don't hand a failed or expired container to the next attempt
+        container_cache.pop(container_key, None)
+        save_container_cache(container_cache)
         print("[error] Container not ready for publishing", file=sys.stderr)
         sys.exit(1)
 
@@ -351,6 +425,10 @@ def main():
         print("[error] Failed to publish to Instagram", file=sys.stderr)
         sys.exit(1)
 
+    # A published container cannot be reused
+    container_cache.pop(container_key, None)
+    save_container_cache(container_cache)
+
     # Mark as posted to prevent duplicates (only for normal posts)
     if post_type != 'essence':
         mark_as_posted(timestamp, media_id)
@@ -6,11 +6,11 @@ Prepare today's post type (normal vs essence) and enrich today.json with essence
 
 import os
 import sys
-import json
-import time
-import http.client
+import functools
 from datetime import date
 
+from _common import json_dumps, json_loads, normalize_json_text, openai_post, save_today
+
 INPUT_FILE = "public/data/today.json"
 
 DEFAULT_PALETTE = ["😢", "😡", "😨", "😮", "🙂", "❤️", "😔", "😤", "😬", "🙏", "🌍", "⚖️"]
@@ -18,56 +18,27 @@ DEFAULT_TEMPERATURE = 0.7
 DEFAULT_FALLBACK_EMOJI = "🌍"
 
 OPENAI_MODEL = "gpt-4o-mini"
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
 
 def load_today(path: str) -> dict:
     if not os.path.exists(path):
         print(f"[error] Input file not found: {path}", file=sys.stderr)
         sys.exit(1)
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def save_today(path: str, data: dict) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    with open(path, "rb") as f:
+        return json_loads(f.read())
 
 
+@functools.lru_cache(maxsize=4)
 def parse_palette(value):
-    if not value:
-        return DEFAULT_PALETTE
-    raw = value.replace(",", " ").split()
-    palette = [p.strip() for p in raw if p.strip()]
-    return palette or DEFAULT_PALETTE
-
-
-def normalize_json_text(raw: str) -> str:
-    if not isinstance(raw, str):
-        raise ValueError("LLM response is not text")
-    text = raw.strip()
-    if text.startswith("```"):
-        parts = text.split("```")
-        for part in parts:
-            candidate = part.strip()
-            if not candidate:
-                continue
-            if candidate.lower().startswith("json"):
-                candidate = candidate[4:].strip()
-            if candidate:
-                return candidate
-        return ""
-    if text and text[0] not in "[{":
-        for marker in ("[", "{"):
-            idx = text.find(marker)
-            if idx != -1:
-                return text[idx:].strip()
-        return text
-    return text
+    """Return (palette, palette_set) for an ESSENCE_EMOJI_PALETTE value; cached per string."""
+    palette = tuple(p.strip() for p in (value or "").replace(",", " ").split() if p.strip())
+    palette = palette or tuple(DEFAULT_PALETTE)
+    return palette, frozenset(palette)
 
 
-def openai_essence_call(items: list, palette: list, temperature: float) -> str:
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
+def openai_essence_call(items: list, palette: tuple, temperature: float) -> str:
+    if not OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY is missing")
 
     system = (
@@ -100,7 +71,7 @@ def openai_essence_call(items: list, palette: list, temperature: float) -> str:
         "additionalProperties": False,
     }
 
-    body = json.dumps({
+    request = {
         "model": OPENAI_MODEL,
         "temperature": temperature,
         "max_tokens": 200,
@@ -114,25 +85,17 @@ def openai_essence_call(items: list, palette: list, temperature: float) -> str:
         },
         "messages": [
             {"role": "system", "content": system},
-            {"role": "user", "content": json.dumps(user_payload, ensure_ascii=False)},
+            {"role": "user", "content": json_dumps(user_payload).decode("utf-8")},
         ],
-    })
-
-    conn = http.client.HTTPSConnection("api.openai.com", timeout=30)
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
     }
-    conn.request("POST", "/v1/chat/completions", body=body.encode("utf-8"), headers=headers)
-    resp = conn.getresponse()
-    data = resp.read()
-    conn.close()
 
-    if resp.status < 200 or resp.status >= 300:
+    status, data = openai_post(request)
+
+    if status < 200 or status >= 300:
         error_msg = data.decode("utf-8", "ignore")
-        raise RuntimeError(f"OpenAI error {resp.status}: {error_msg[:200]}")
+        raise RuntimeError(f"OpenAI error {status}: {error_msg[:200]}")
 
-    payload = json.loads(data.decode("utf-8"))
+    payload = json_loads(data)
     choices = payload.get("choices", [])
     if not choices:
         raise RuntimeError("OpenAI response missing choices")
@@ -145,9 +108,9 @@ def openai_essence_call(items: list, palette: list, temperature: float) -> str:
     return text
 
 
-def validate_essence(raw: str, palette: list) -> dict:
+def validate_essence(raw: str, palette_set: frozenset) -> dict:
     cleaned = normalize_json_text(raw)
-    data = json.loads(cleaned)
+    data = json_loads(cleaned)
     if not isinstance(data, dict):
         raise ValueError("Essence response must be an object")
     label = data.get("emotion_label")
@@ -155,7 +118,7 @@ def validate_essence(raw: str, palette: list) -> dict:
     rationale = data.get("rationale")
     if not isinstance(label, str) or not label.strip():
         raise ValueError("Essence label missing")
-    if not isinstance(emoji, str) or emoji not in palette:
+    if not isinstance(emoji, str) or emoji not in palette_set:
         raise ValueError("Essence emoji not in palette")
     if not isinstance(rationale, str) or not rationale.strip():
         raise ValueError("Essence rationale missing")
@@ -177,28 +140,16 @@ def build_items_for_llm(emojis: list) -> list:
     return items
 
 
-def main() -> int:
-    data = load_today(INPUT_FILE)
-    palette = parse_palette(os.environ.get("ESSENCE_EMOJI_PALETTE"))
-    temperature = float(os.environ.get("ESSENCE_TEMPERATURE", DEFAULT_TEMPERATURE))
-    fallback_emoji = os.environ.get("ESSENCE_FALLBACK_EMOJI", DEFAULT_FALLBACK_EMOJI)
-
-    # POST_TYPE must be explicitly set (normal or essence)
-    explicit_post_type = os.environ.get("POST_TYPE", "").lower()
-    if explicit_post_type not in ["normal", "essence"]:
-        print(f"[error] POST_TYPE must be 'normal' or 'essence', got: '{explicit_post_type}'", file=sys.stderr)
-        sys.exit(1)
+def _run_normal(data: dict) -> None:
+    data["post_type"] = "normal"
+    data.pop("essence", None)
+    print(f"[info] Created normal post")
 
-    should_post_essence = explicit_post_type == "essence"
-    print(f"[info] POST_TYPE={explicit_post_type}")
 
-    if not should_post_essence:
-        data["post_type"] = "normal"
-        if "essence" in data:
-            del data["essence"]
-        save_today(INPUT_FILE, data)
-        print(f"[info] Created normal post")
-        return 0
+def _run_essence(data: dict) -> None:
+    palette, palette_set = parse_palette(os.environ.get("ESSENCE_EMOJI_PALETTE"))
+    temperature = float(os.environ.get("ESSENCE_TEMPERATURE", DEFAULT_TEMPERATURE))
+    fallback_emoji = os.environ.get("ESSENCE_FALLBACK_EMOJI", DEFAULT_FALLBACK_EMOJI)
 
     emojis = data.get("emojis", [])
     items = build_items_for_llm(emojis)
@@ -207,7 +158,7 @@ def main() -> int:
 
     try:
         raw = openai_essence_call(items, palette, temperature)
-        essence = validate_essence(raw, palette)
+        essence = validate_essence(raw, palette_set)
     except Exception as e:
         failure = str(e)
 
@@ -222,18 +173,37 @@ def main() -> int:
     data["post_type"] = "essence"
     data["essence"] = {
         **essence,
-        "palette": palette,
+        "palette": list(palette),
         "temperature": temperature,
         "fallback": failure is not None,
     }
 
-    save_today(INPUT_FILE, data)
-
     print(f"[info] Created essence post")
     print(f"[info] Essence label: {essence['emotion_label']}")
     print(f"[info] Essence emoji: {essence['emoji']}")
     print(f"[info] Essence rationale: {essence['rationale']}")
 
+
+# POST_TYPE must be explicitly set to one of these
+_POST_TYPE_HANDLERS = {
+    "normal": _run_normal,
+    "essence": _run_essence,
+}
+
+
+def main() -> int:
+    explicit_post_type = os.environ.get("POST_TYPE", "").lower()
+    handler = _POST_TYPE_HANDLERS.get(explicit_post_type)
+    if handler is None:
+        print(f"[error] POST_TYPE must be 'normal' or 'essence', got: '{explicit_post_type}'", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"[info] POST_TYPE={explicit_post_type}")
+
+    # Handlers only update data in memory; today.json is written once, atomically
+    data = load_today(INPUT_FILE)
+    handler(data)
+    save_today(INPUT_FILE, data)
     return 0
 
 
@@ -6,15 +6,21 @@ AI-driven daily emoji generator for Today in Emojis.
 - Fetch up to 10 headlines per RSS source (balanced sampling; max 40 total)
 - Ask an LLM (OpenAI) to select 5 important, diverse items and assign 1 emoji each
 - Strictly validate response; retry once; safe fallback if needed
-- Write data/today.json and append data/history.json
+- Reuse a recent validated selection when the candidate URL set is unchanged
+- Write data/today.json and append a line to data/history.jsonl
 
 Secret:
 - OPENAI_API_KEY
 """
 
-import os, sys, json, random, datetime, time, http.client, re, html
+import os, sys, json, random, datetime, time, re, html, hashlib, io
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any
+from urllib.error import HTTPError
 from urllib.request import urlopen, Request
+from xml.etree import ElementTree
+
+from _common import json_dumps, json_loads, normalize_json_text, openai_post, save_today
 
 try:
     import feedparser  # pip install feedparser
@@ -34,76 +40,181 @@ RSS_SOURCES = [
 PER_SOURCE_LIMIT = 10     # up to 10 from each source
 MAX_ITEMS = 40            # cap after merge
 PICK_COUNT = 5            # final emojis count
+PROMPT_TITLE_CHARS = 120  # titles are cut to this length in the prompt only
 
 OUTPUT_TODAY = "public/data/today.json"
-OUTPUT_HISTORY = "data/history.json"
+OUTPUT_HISTORY = "data/history.jsonl"   # one JSON entry per line
+LEGACY_HISTORY = "data/history.json"     # old single-array format, migrated on first run
+
+# Validated LLM selections, keyed by the candidate URL set
+LLM_CACHE_DIR = "data/.llm_cache"
+LLM_CACHE_TTL = 6 * 60 * 60  # seconds
+
+# Last body + ETag/Last-Modified per feed, for conditional GETs
+FEED_CACHE_DIR = "data/.feed_cache"
+
+# Verbose [debug] logging on the success path; failure diagnostics always print
+DEBUG = os.environ.get("EMOJIS_DEBUG", "0") == "1"
 
 USER_AGENT = "Mozilla/5.0 (compatible; TodayInEmojis/1.0; +https://github.com)"
 TIMEOUT = 25
 
 # OpenAI model
 OPENAI_MODEL = "gpt-4o-mini"
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+
+# clean_summary: HTML tags and whitespace runs
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
 
 # -----------------------
 # Helpers
 # -----------------------
+def debug(msg: str) -> None:
+    if DEBUG:
+        print(f"[debug] {msg}", file=sys.stderr)
+
+def feed_cache_paths(url: str):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    base = os.path.join(FEED_CACHE_DIR, key)
+    return base + ".xml", base + ".json"
+
+def store_feed_cache(url: str, data: bytes, validators: Dict[str, str]) -> None:
+    body_path, meta_path = feed_cache_paths(url)
+    try:
+        os.makedirs(FEED_CACHE_DIR, exist_ok=True)
+        for path, content in ((body_path, data), (meta_path, json_dumps(validators))):
+            with open(path + ".tmp", "wb") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"[warn] Could not cache feed {url}: {e}", file=sys.stderr)
+
 def fetch_feed_bytes(url: str) -> bytes:
-    req = Request(url, headers={"User-Agent": USER_AGENT})
-    with urlopen(req, timeout=TIMEOUT) as resp:
-        return resp.read()
+    """GET a feed, revalidating the cached copy with If-None-Match / If-Modified-Since."""
+    body_path, meta_path = feed_cache_paths(url)
+    headers = {"User-Agent": USER_AGENT}
+    validators: Dict[str, str] = {}
+    if os.path.exists(body_path):
+        try:
+            with open(meta_path, "rb") as f:
+                validators = json_loads(f.read())
+        except (OSError, ValueError):
+            validators = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    req = Request(url, headers=headers)
+    try:
+        with urlopen(req, timeout=TIMEOUT) as resp:
+            data = resp.read()
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+    except HTTPError as e:
+        if e.code == 304 and validators:
+            with open(body_path, "rb") as f:
+                return f.read()
+        raise
+    if etag or last_modified:
+        store_feed_cache(url, data, {"etag": etag or "", "last_modified": last_modified or ""})
+    return data
 
 def clean_summary(text: str) -> str:
     """Strip HTML and compact whitespace for short summaries."""
     if not text:
         return ""
     text = html.unescape(text)
-    text = re.sub(r"<[^>]+>", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _TAG_RE.sub(" ", text)
+    text = _WS_RE.sub(" ", text).strip()
     if len(text) > 240:
         text = text[:237].rstrip() + "..."
     return text
 
-def collect_headlines() -> List[Dict[str, str]]:
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def iter_feed_items(data: bytes):
+    """
+    Yield {"title", "link", "summary"} for each RSS <item> / Atom <entry>, streaming
+    with iterparse and freeing each element once read. Raises ParseError on bad XML.
+    """
+    for _, elem in ElementTree.iterparse(io.BytesIO(data), events=("end",)):
+        if _local_name(elem.tag) not in ("item", "entry"):
+            continue
+        fields = {}
+        for child in elem:
+            name = _local_name(child.tag)
+            if name == "link" and child.get("href"):
+                # Atom: <link rel="alternate" href="..."/>
+                if child.get("rel", "alternate") == "alternate":
+                    fields.setdefault("link", child.get("href"))
+            elif name in ("title", "link", "summary", "description", "content"):
+                fields.setdefault(name, child.text or "")
+        yield {
+            "title": fields.get("title", ""),
+            "link": fields.get("link", ""),
+            "summary": fields.get("summary") or fields.get("description") or fields.get("content") or "",
+        }
+        elem.clear()
+
+def iter_feedparser_items(data: bytes):
+    """Slower, more forgiving fallback for feeds ElementTree cannot parse."""
+    for e in feedparser.parse(data).get("entries", []):
+        yield {
+            "title": e.get("title") or "",
+            "link": e.get("link") or "",
+            "summary": (
+                e.get("summary")
+                or (e.get("summary_detail") or {}).get("value")
+                or e.get("description")
+                or ""
+            ),
+        }
+
+def take_entries(items) -> List[Dict[str, str]]:
+    """Keep up to PER_SOURCE_LIMIT items that have both a title and a link."""
     entries: List[Dict[str, str]] = []
-    for url in RSS_SOURCES:
-        try:
-            data = fetch_feed_bytes(url)
-            feed = feedparser.parse(data)
-            count = 0
-            for e in feed.get("entries", []):
-                title = (e.get("title") or "").strip()
-                link = (e.get("link") or "").strip()
-                summary_raw = (
-                    e.get("summary")
-                    or (e.get("summary_detail") or {}).get("value")
-                    or e.get("description")
-                    or ""
-                )
-                summary = clean_summary(summary_raw)
-                if not title or not link:
-                    continue
-                entries.append({"title": title, "url": link, "summary": summary})
-                count += 1
-                if count >= PER_SOURCE_LIMIT:
-                    break
-        except Exception as ex:
-            print(f"[warn] RSS fetch failed: {url} -> {ex}", file=sys.stderr)
+    for item in items:
+        title = item["title"].strip()
+        link = item["link"].strip()
+        if not title or not link:
             continue
+        # Summaries are cleaned later, only for the PICK_COUNT items the LLM selects
+        entries.append({"title": title, "url": link, "summary_raw": item["summary"]})
+        if len(entries) >= PER_SOURCE_LIMIT:
+            break
+    return entries
+
+def fetch_feed_entries(url: str) -> List[Dict[str, str]]:
+    """Fetch and parse one feed, keeping up to PER_SOURCE_LIMIT usable entries."""
+    data = fetch_feed_bytes(url)
+    try:
+        return take_entries(iter_feed_items(data))
+    except ElementTree.ParseError as ex:
+        print(f"[info] Falling back to feedparser for {url}: {ex}", file=sys.stderr)
+        return take_entries(iter_feedparser_items(data))
 
-    # Shuffle to avoid ordering bias; then cap overall to MAX_ITEMS
-    random.shuffle(entries)
-    return entries[:MAX_ITEMS]
+def collect_headlines() -> List[Dict[str, str]]:
+    entries: List[Dict[str, str]] = []
+    # Fetch and parse all feeds concurrently, so parsing overlaps the slowest fetch
+    with ThreadPoolExecutor(max_workers=len(RSS_SOURCES)) as pool:
+        futures = {pool.submit(fetch_feed_entries, url): url for url in RSS_SOURCES}
+        for future in as_completed(futures):
+            try:
+                entries.extend(future.result())
+            except Exception as ex:
+                print(f"[warn] RSS fetch failed: {futures[future]} -> {ex}", file=sys.stderr)
+
+    # Random order (avoids source/completion bias), capped to MAX_ITEMS
+    return random.sample(entries, min(MAX_ITEMS, len(entries)))
 
 def unique_urls(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    seen = set()
-    out = []
+    """Drop repeated URLs, keeping the first item for each in original order."""
+    first: Dict[Any, Dict[str, Any]] = {}
     for it in items:
-        u = it.get("url")
-        if u in seen:
-            continue
-        seen.add(u)
-        out.append(it)
-    return out
+        first.setdefault(it.get("url"), it)
+    return list(first.values())
 
 def safe_defaults() -> Dict[str, Any]:
     return {
@@ -118,49 +229,28 @@ def safe_defaults() -> Dict[str, Any]:
         "source": "fallback",
     }
 
-def normalize_json_text(raw: str) -> str:
-    """Normalize JSON-like strings from LLMs by stripping fences and whitespace."""
-    if not isinstance(raw, str):
-        raise ValueError("LLM response is not text")
-    text = raw.strip()
-    if text.startswith("```"):
-        parts = text.split("```")
-        for part in parts:
-            candidate = part.strip()
-            if not candidate:
-                continue
-            if candidate.lower().startswith("json"):
-                candidate = candidate[4:].strip()
-            if candidate:
-                return candidate
-        return ""
-    if text and text[0] not in "[{":
-        for marker in ("[", "{"):
-            idx = text.find(marker)
-            if idx != -1:
-                return text[idx:].strip()
-        return text
-    return text
-
-def validate_response(raw: str, allowed_urls: List[str], headlines: List[Dict[str, str]]) -> List[Dict[str, str]]:
+def validate_response(raw: str, headlines: List[Dict[str, str]]) -> List[Dict[str, str]]:
     """
     Expect STRICT JSON (no prose):
     [
-      {"emoji": "💹", "label": "markets", "url": "<one of allowed_urls>"},
+      {"emoji": "💹", "label": "markets", "idx": <1-based position in headlines>},
       ... x5
     ]
     """
-    print(f"[debug] Validating response (length: {len(raw)} chars)", file=sys.stderr)
-
-    cleaned = normalize_json_text(raw)
-    print(f"[debug] Cleaned JSON (first 300 chars): {cleaned[:300]}", file=sys.stderr)
+    debug(f"Validating response (length: {len(raw)} chars)")
 
     try:
-        data = json.loads(cleaned)
-    except json.JSONDecodeError as ex:
-        print(f"[debug] JSON parse error at position {ex.pos}: {ex.msg}", file=sys.stderr)
-        print(f"[debug] Context around error: {cleaned[max(0,ex.pos-50):ex.pos+50]}", file=sys.stderr)
-        raise ValueError(f"Invalid JSON: {ex.msg} (char {ex.pos})") from ex
+        # Strict json_schema output is normally bare JSON; skip the fence handling
+        data = json_loads(raw)
+    except json.JSONDecodeError:
+        cleaned = normalize_json_text(raw)
+        debug(f"Cleaned JSON (first 300 chars): {cleaned[:300]}")
+        try:
+            data = json_loads(cleaned)
+        except json.JSONDecodeError as ex:
+            print(f"[debug] JSON parse error at position {ex.pos}: {ex.msg}", file=sys.stderr)
+            print(f"[debug] Context around error: {cleaned[max(0,ex.pos-50):ex.pos+50]}", file=sys.stderr)
+            raise ValueError(f"Invalid JSON: {ex.msg} (char {ex.pos})") from ex
 
     if isinstance(data, dict):
         selections = data.get("selections")
@@ -176,10 +266,6 @@ def validate_response(raw: str, allowed_urls: List[str], headlines: List[Dict[st
         print(f"[debug] Got {len(data)} items instead of {PICK_COUNT}", file=sys.stderr)
         raise ValueError(f"Expected {PICK_COUNT} items, got {len(data)}")
 
-    # Create URL to title/summary mapping
-    url_to_title = {h["url"]: h["title"] for h in headlines}
-    url_to_summary = {h["url"]: h.get("summary", "") for h in headlines}
-
     seen_urls = set()
     results: List[Dict[str, str]] = []
     for i, item in enumerate(data):
@@ -187,7 +273,7 @@ def validate_response(raw: str, allowed_urls: List[str], headlines: List[Dict[st
             raise ValueError(f"Item {i} not an object")
         emoji = item.get("emoji")
         label = item.get("label")
-        url = item.get("url")
+        idx = item.get("idx")
         if not (isinstance(emoji, str) and 1 <= len(emoji) <= 4):
             raise ValueError(f"Item {i} invalid emoji: {repr(emoji)}")
         if isinstance(label, str):
@@ -196,19 +282,18 @@ def validate_response(raw: str, allowed_urls: List[str], headlines: List[Dict[st
                 label = label[:48].rstrip()
         if not (isinstance(label, str) and 1 <= len(label) <= 48):
             raise ValueError(f"Item {i} invalid label: {repr(label)}")
-        if not (isinstance(url, str) and url in allowed_urls):
-            print(f"[debug] Item {i} URL '{url[:100]}' not in allowed set", file=sys.stderr)
-            raise ValueError(f"Item {i} url not in allowed set")
+        if not (type(idx) is int and 1 <= idx <= len(headlines)):
+            print(f"[debug] Item {i} idx {idx!r} out of range 1..{len(headlines)}", file=sys.stderr)
+            raise ValueError(f"Item {i} invalid idx: {repr(idx)}")
+        h = headlines[idx - 1]
+        url = h["url"]
         if url in seen_urls:
             raise ValueError(f"Duplicate url at item {i}")
         seen_urls.add(url)
 
-        # Get the original headline title from the URL
-        title = url_to_title.get(url, label)
-        summary = url_to_summary.get(url, "")
-        results.append({"char": emoji, "label": label, "url": url, "title": title, "summary": summary})
+        results.append({"char": emoji, "label": label, "url": url, "title": h["title"], "summary": clean_summary(h.get("summary_raw", ""))})
 
-    print(f"[debug] Validation successful: {len(results)} items", file=sys.stderr)
+    debug(f"Validation successful: {len(results)} items")
     return results
 
 def to_today_json(items: List[Dict[str, str]]) -> Dict[str, Any]:
@@ -220,18 +305,40 @@ def to_today_json(items: List[Dict[str, str]]) -> Dict[str, Any]:
         "source": "ai-openai",
     }
 
+def llm_cache_path(allowed_urls: List[str]) -> str:
+    key = hashlib.sha256("\n".join(sorted(allowed_urls)).encode("utf-8")).hexdigest()
+    return os.path.join(LLM_CACHE_DIR, f"{key}.json")
+
+def load_cached_selection(path: str):
+    """Return a cached validated selection younger than LLM_CACHE_TTL, else None."""
+    try:
+        if time.time() - os.path.getmtime(path) > LLM_CACHE_TTL:
+            return None
+        with open(path, "rb") as f:
+            items = json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+    return items if isinstance(items, list) and len(items) == PICK_COUNT else None
+
+def store_cached_selection(path: str, items: List[Dict[str, str]]) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json_dumps(items))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[warn] Could not cache LLM selection: {e}", file=sys.stderr)
+
 # -----------------------
 # LLM call
 # -----------------------
 def openai_call(headlines: List[Dict[str, str]]) -> str:
     """Call the OpenAI Responses API via HTTPS with a strict JSON schema."""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
+    if not OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY is missing")
 
-    items = [{"idx": i + 1, "title": h["title"], "url": h["url"]} for i, h in enumerate(headlines)]
-    allowed_urls = [h["url"] for h in headlines]
-
+    items = [{"idx": i + 1, "title": h["title"][:PROMPT_TITLE_CHARS]} for i, h in enumerate(headlines)]
     system = (
         "You select the day's 5 most important and diverse news items from a provided list, "
         "assign exactly one fitting emoji to each, and respond using the required JSON schema."
@@ -240,10 +347,9 @@ def openai_call(headlines: List[Dict[str, str]]) -> str:
         "task": (
             "Review the provided headlines, pick 5 unique items that cover different topics, "
             "assign a single emoji to each, craft a short lowercase label (<=48 chars), "
-            "and copy the exact URL from the allowed list."
+            "and reference the chosen headline by its idx."
         ),
         "headlines": items,
-        "allowed_urls": allowed_urls,
         "rules": [
             "Return JSON only.",
             "Use the provided schema exactly.",
@@ -260,12 +366,12 @@ def openai_call(headlines: List[Dict[str, str]]) -> str:
                 "maxItems": PICK_COUNT,
                 "items": {
                     "type": "object",
-                    "required": ["emoji", "label", "url"],
+                    "required": ["emoji", "label", "idx"],
                     "additionalProperties": False,
                     "properties": {
                         "emoji": {"type": "string", "minLength": 1, "maxLength": 4},
                         "label": {"type": "string", "minLength": 1, "maxLength": 48},
-                        "url": {"type": "string", "enum": allowed_urls},
+                        "idx": {"type": "integer", "minimum": 1, "maximum": len(items)},
                     },
                 },
             }
@@ -274,10 +380,10 @@ def openai_call(headlines: List[Dict[str, str]]) -> str:
         "additionalProperties": False,
     }
 
-    body = json.dumps({
+    request = {
         "model": OPENAI_MODEL,
         "temperature": 0.2,
-        "max_tokens": 1000,
+        "max_tokens": 250,  # 5 x {emoji, label, idx} is well under 200
         "response_format": {
             "type": "json_schema",
             "json_schema": {
@@ -288,35 +394,27 @@ def openai_call(headlines: List[Dict[str, str]]) -> str:
         },
         "messages": [
             {"role": "system", "content": system},
-            {"role": "user", "content": json.dumps(user_payload, ensure_ascii=False)},
+            {"role": "user", "content": json_dumps(user_payload).decode("utf-8")},
         ],
-    })
-
-    conn = http.client.HTTPSConnection("api.openai.com", timeout=30)
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
     }
-    conn.request("POST", "/v1/chat/completions", body=body.encode("utf-8"), headers=headers)
-    resp = conn.getresponse()
-    data = resp.read()
-    conn.close()
 
-    if resp.status < 200 or resp.status >= 300:
+    status, data = openai_post(request)
+
+    if status < 200 or status >= 300:
         error_msg = data.decode('utf-8', 'ignore')
-        print(f"[debug] OpenAI API error {resp.status}: {error_msg[:500]}", file=sys.stderr)
-        raise RuntimeError(f"OpenAI error {resp.status}: {error_msg[:200]}")
+        print(f"[debug] OpenAI API error {status}: {error_msg[:500]}", file=sys.stderr)
+        raise RuntimeError(f"OpenAI error {status}: {error_msg[:200]}")
 
     # Parse the response
     try:
-        payload = json.loads(data.decode("utf-8"))
+        payload = json_loads(data)
     except json.JSONDecodeError as e:
         raw_text = data.decode('utf-8', 'ignore')
         print(f"[debug] Failed to parse OpenAI response. Raw data (first 1000 chars): {raw_text[:1000]}", file=sys.stderr)
         raise RuntimeError(f"Failed to parse OpenAI response: {e}")
 
     # Debug: show full response structure
-    print(f"[debug] OpenAI response keys: {list(payload.keys())}", file=sys.stderr)
+    debug(f"OpenAI response keys: {list(payload.keys())}")
 
     # Extract text from Chat Completions response
     choices = payload.get("choices", [])
@@ -333,11 +431,33 @@ def openai_call(headlines: List[Dict[str, str]]) -> str:
         print(f"[debug] Empty content in OpenAI response. Full payload: {snippet}", file=sys.stderr)
         raise RuntimeError("OpenAI response empty")
 
-    print(f"[debug] Extracted text length: {len(text)} chars", file=sys.stderr)
-    print(f"[debug] First 200 chars: {text[:200]}", file=sys.stderr)
+    debug(f"Extracted text length: {len(text)} chars")
+    debug(f"First 200 chars: {text[:200]}")
 
     return text
 
+def migrate_legacy_history() -> None:
+    """One-shot conversion of the old history.json array into history.jsonl."""
+    if os.path.exists(OUTPUT_HISTORY) or not os.path.exists(LEGACY_HISTORY):
+        return
+    try:
+        with open(LEGACY_HISTORY, "rb") as f:
+            hist = json_loads(f.read())
+    except (OSError, ValueError) as e:
+        # Unreadable legacy file: set it aside so the migration is not retried every run
+        corrupt_path = LEGACY_HISTORY + ".corrupt"
+        print(f"[warn] Could not read {LEGACY_HISTORY} ({e}); moving it to {corrupt_path}", file=sys.stderr)
+        os.replace(LEGACY_HISTORY, corrupt_path)
+        return
+    if not isinstance(hist, list):
+        hist = []
+    tmp_path = OUTPUT_HISTORY + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.writelines(json_dumps(entry) + b"\n" for entry in hist)
+    os.replace(tmp_path, OUTPUT_HISTORY)
+    os.remove(LEGACY_HISTORY)
+    print(f"[info] Migrated {len(hist)} history entries to {OUTPUT_HISTORY}")
+
 # -----------------------
 # Main
 # -----------------------
@@ -346,21 +466,26 @@ def main():
     if not headlines:
         print("[warn] No headlines, writing safe defaults.")
         os.makedirs(os.path.dirname(OUTPUT_TODAY), exist_ok=True)
-        with open(OUTPUT_TODAY, "w", encoding="utf-8") as f:
-            json.dump(safe_defaults(), f, ensure_ascii=False, indent=2)
+        save_today(OUTPUT_TODAY, safe_defaults())
         return 0
 
     allowed_urls = [h["url"] for h in headlines]
 
+    # Identical candidate set to a recent run: reuse its selection
+    cache_path = llm_cache_path(allowed_urls)
+    results = load_cached_selection(cache_path)
+    if results is not None:
+        print(f"[info] Reusing cached LLM selection ({cache_path})")
+
     # Call LLM with one retry on validation failure
     tries = 0
-    results = None
     while tries < 2 and results is None:
         tries += 1
         try:
             raw = openai_call(headlines)
-            items = validate_response(raw, allowed_urls, headlines)
+            items = validate_response(raw, headlines)
             results = items
+            store_cached_selection(cache_path, items)
         except Exception as e:
             print(f"[warn] LLM parse/validation failed (try {tries}): {e}", file=sys.stderr)
             time.sleep(2)
@@ -373,24 +498,19 @@ def main():
 
     # Write today.json
     os.makedirs(os.path.dirname(OUTPUT_TODAY), exist_ok=True)
-    with open(OUTPUT_TODAY, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    save_today(OUTPUT_TODAY, data)
 
-    # Append history.json
+    # Append history.jsonl
     try:
-        hist = []
-        if os.path.exists(OUTPUT_HISTORY):
-            with open(OUTPUT_HISTORY, "r", encoding="utf-8") as f:
-                hist = json.load(f)
-                if not isinstance(hist, list):
-                    hist = []
-        hist.append({
+        os.makedirs(os.path.dirname(OUTPUT_HISTORY), exist_ok=True)
+        migrate_legacy_history()
+        entry = {
             "date": datetime.date.today().isoformat(),
             "emojis": data["emojis"],
             "meta": {"provider": "openai", "total_candidates": len(headlines)}
-        })
-        with open(OUTPUT_HISTORY, "w", encoding="utf-8") as f:
-            json.dump(hist, f, ensure_ascii=False, indent=2)
+        }
+        with open(OUTPUT_HISTORY, "ab") as f:
+            f.write(json_dumps(entry) + b"\n")
     except Exception as e:
         print(f"[warn] Could not append history: {e}", file=sys.stderr)
 
@@ -15,7 +15,8 @@ interface CLIInput {
   post_type: 'normal' | 'essence';
   emojis?: any[];
   essence?: any;
-  image_buffer_base64: string;
+  image_path: string;
+  image_sha256?: string;
   rss_sources: string[];
   model: string;
   provider: string;
@@ -26,6 +27,7 @@ async function main() {
 
   if (args.length === 0) {
     console.error('Usage: produce.ts <input-json-file>');
+    console.error('       produce.ts -              (read input JSON from stdin)');
     console.error('       produce.ts --health-check');
     process.exit(1);
   }
@@ -39,18 +41,16 @@ async function main() {
 
   // Production mode
   const inputFile = args[0];
+  const fromStdin = inputFile === '-';
 
-  if (!fs.existsSync(inputFile)) {
+  if (!fromStdin && !fs.existsSync(inputFile)) {
     console.error(`[error] Input file not found: ${inputFile}`);
     process.exit(1);
   }
 
   try {
-    // Read input
-    const inputData: CLIInput = JSON.parse(fs.readFileSync(inputFile, 'utf-8'));
-
-    // Convert base64 image to Buffer
-    const imageBuffer = Buffer.from(inputData.image_buffer_base64, 'base64');
+    // Read input (fd 0 when piped from the Python wrapper)
+    const inputData: CLIInput = JSON.parse(fs.readFileSync(fromStdin ? 0 : inputFile, 'utf-8'));
 
     // Build producer input
     const producerInput: ProducerInput = {
@@ -58,7 +58,8 @@ async function main() {
       post_type: inputData.post_type,
       emojis: inputData.emojis,
       essence: inputData.essence,
-      image_buffer: imageBuffer,
+      image_path: inputData.image_path,
+      image_sha256: inputData.image_sha256,
       rss_sources: inputData.rss_sources,
       model: inputData.model,
       provider: inputData.provider,
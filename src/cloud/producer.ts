@@ -31,7 +31,8 @@ export interface ProducerInput {
     temperature: number;
     fallback: boolean;
   };
-  image_buffer: Buffer;            // Generated image
+  image_path: string;              // Local path of the generated image
+  image_sha256?: string;           // SHA-256 of the image file (hex)
   rss_sources: string[];
   model: string;
   provider: string;
@@ -67,10 +68,11 @@ export async function produceEdition(input: ProducerInput): Promise<CloudEdition
 
   // Upload image to cloud storage
   const uploadResult = await uploadImage(
-    input.image_buffer,
+    input.image_path,
     input.date,
     input.post_type,
-    input.post_type === 'normal' ? sequenceIndex : undefined
+    input.post_type === 'normal' ? sequenceIndex : undefined,
+    input.image_sha256
   );
 
   // Build edition object
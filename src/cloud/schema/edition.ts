@@ -61,7 +61,7 @@ export interface SourceMetadata {
  * Helper type for creating new editions
  */
 export type CreateEditionInput = Omit<CloudEdition, 'edition_id' | 'timestamp' | 'assets'> & {
-  image_buffer: Buffer;            // Image data to upload
+  image_path: string;              // Local image file to upload
 };
 
 /**
@@ -14,13 +14,14 @@ export interface UploadResult {
 }
 
 /**
- * Upload an image to Cloud Storage
+ * Upload an image to Cloud Storage (streamed from the local file)
  */
 export async function uploadImage(
-  imageBuffer: Buffer,
+  imagePath: string,      // Local path of the generated PNG
   date: string,           // YYYY-MM-DD
   type: 'normal' | 'essence',
-  index?: number          // Only for normal posts (1-5)
+  index?: number,         // Only for normal posts (1-5)
+  sha256?: string         // Hex digest computed by the Python wrapper
 ): Promise<UploadResult> {
   const config = getCloudConfig();
 
@@ -44,13 +45,14 @@ export async function uploadImage(
   });
 
   const bucket = storage.bucket(config.storageBucket);
-  const file = bucket.file(path);
 
-  // Upload file
-  await file.save(imageBuffer, {
+  // Upload file (streams from disk instead of buffering the whole image)
+  await bucket.upload(imagePath, {
+    destination: path,
     contentType: 'image/png',
     metadata: {
       cacheControl: 'public, max-age=31536000', // 1 year (images are immutable)
+      metadata: sha256 ? { sha256 } : undefined,
     },
     public: true, // Make publicly accessible
   });